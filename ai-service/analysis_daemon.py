@@ -0,0 +1,149 @@
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+from typing import Callable, Dict, Optional
+
+from config import daemon_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One JSON request line from the client, answered with JSON lines:
+# {"output": record} for every record the CLI would print, then {"exit": code}
+
+
+def run_in_daemon(request: Dict, emit: Callable[[Dict], None], socket_path: Optional[str] = None) -> Optional[int]:
+    """Send a CLI request to a running daemon, passing each output record to emit
+
+    Returns the exit code, or None when no daemon is listening so the caller
+    can score in-process instead.
+    """
+    socket_path = socket_path or daemon_config.socket_path
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(daemon_config.timeout)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        # Missing socket file, or a stale one left by a daemon that died
+        client.close()
+        return None
+
+    with client, client.makefile("rwb") as stream:
+        stream.write(json.dumps(request).encode("utf-8") + b"\n")
+        stream.flush()
+        for line in stream:
+            message = json.loads(line)
+            if "exit" in message:
+                return int(message["exit"])
+            emit(message["output"])
+    raise ConnectionError("Analysis daemon closed the connection without an exit code")
+
+
+def build_cli_parser() -> argparse.ArgumentParser:
+    """Argument parser of the analyze.py CLI"""
+    parser = argparse.ArgumentParser(description="Resume vs JD analysis")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--resume", help="Path to resume file")
+    source.add_argument("--resumes-dir", help="Rank every resume in a directory against the JD")
+    parser.add_argument("--jd", required=True, help="Job description text")
+    parser.add_argument("--no-llm", action="store_true", help="Disable LLM enhancement")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Resumes encoded per batch with --resumes-dir")
+    parser.add_argument("--no-daemon", action="store_true", help="Score in this process even if the analysis daemon is running")
+    return parser
+
+
+def cli_request(args: argparse.Namespace) -> Dict:
+    """Request for run_command built from parsed CLI arguments"""
+    return {
+        "command": "analyze",
+        # Absolute paths, since the daemon may run from another directory
+        "resume": os.path.abspath(args.resume) if args.resume else None,
+        "resumes_dir": os.path.abspath(args.resumes_dir) if args.resumes_dir else None,
+        "jd": args.jd,
+        "use_llm": not args.no_llm,
+        "chunk_size": args.chunk_size,
+    }
+
+
+def print_record(record: Dict) -> None:
+    print(json.dumps(record), flush=True)
+
+
+def forward_cli() -> None:
+    """Hand the analyze.py command line to a running daemon and exit with its result
+
+    Returns without output when --no-daemon is given or no daemon is running,
+    so the CLI can score in-process.
+    """
+    args = build_cli_parser().parse_args()
+    if args.no_daemon:
+        return
+    code = run_in_daemon(cli_request(args), print_record)
+    if code is not None:
+        raise SystemExit(code)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        from analyze import run_command
+
+        def emit(record: Dict) -> None:
+            self.wfile.write(json.dumps({"output": record}).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+        try:
+            request = json.loads(self.rfile.readline())
+            code = run_command(request, emit)
+        except BrokenPipeError:
+            return
+        except Exception as e:
+            logger.error(f"Daemon request failed: {e}")
+            emit({"error": str(e)})
+            code = 1
+        self.wfile.write(json.dumps({"exit": code}).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: Optional[str] = None) -> None:
+    """Load and warm the model, then answer CLI requests on a Unix socket until interrupted"""
+    from model_registry import model_registry
+
+    socket_path = socket_path or daemon_config.socket_path
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    if run_in_daemon({"command": "ping"}, lambda record: None, socket_path) is not None:
+        raise SystemExit(f"An analysis daemon is already listening on {socket_path}")
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # stale socket of a daemon that did not shut down cleanly
+
+    model_registry.warmup()
+    # Stop cleanly on SIGTERM as well as Ctrl-C so the socket file is removed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with _Server(socket_path, _RequestHandler) as server:
+        os.chmod(socket_path, 0o600)
+        logger.info(f"Analysis daemon listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
+    logger.info("Analysis daemon stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Keep the analysis model warm for fast analyze.py runs")
+    parser.add_argument("--socket", default=daemon_config.socket_path, help="Unix socket to listen on")
+    args = parser.parse_args()
+    serve(args.socket)
+
+
+if __name__ == "__main__":
+    main()
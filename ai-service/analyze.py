@@ -1,72 +1,114 @@
-import argparse
-import json
+import contextvars
 import logging
 import os
 import re
-from typing import Dict, List
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple, Union
 
-import torch
-from sentence_transformers import SentenceTransformer, util
-from local_llm import get_llm_client
+if __name__ == "__main__":
+  # A warm analysis daemon answers the CLI before the imports below are paid for
+  from analysis_daemon import forward_cli
+
+  forward_cli()
+
+import numpy as np
+
+from analysis_daemon import build_cli_parser, cli_request, print_record
+from cache import SingleFlight, llm_cache, llm_key, stream_text_key, text_cache, text_key
+from chunking import document_embedding, document_similarity, encode_documents
+from config import extraction_config, llm_config, storage_config
+from extraction import ExtractionError, pdf_extractor
+from local_llm import PROMPT_VERSION, get_llm_client
+from prompt_budget import compact_prompt_texts
+from resume_store import get_resume_store, resume_id
+from skill_taxonomy import TERM_TOKEN, skill_taxonomy
+from tracing import span
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def load_resume_text(path: str) -> str:
+ResumeSource = Union[str, bytes, BinaryIO]
+
+
+def extract_resume_text(source: Union[bytes, BinaryIO], filename: str) -> str:
+  """Extract text from the bytes or binary file object of a resume; raises ExtractionError if it cannot be read."""
+  if filename.lower().endswith(".pdf"):
+    return pdf_extractor.extract(source, os.path.basename(filename))
+  data = source if isinstance(source, bytes) else source.read()
+  return data.decode("utf-8", errors="ignore")
+
+
+def read_resume_file(path: str) -> str:
+  """Extract the text of a resume file without the cache; raises ExtractionError on failure."""
+  try:
+    with open(path, "rb") as f:
+      return extract_resume_text(f, path)
+  except OSError as e:
+    raise ExtractionError(f"Could not read file: {e.strerror or e}")
+
+
+def parse_resume_file(path: str) -> str:
+  """Best-effort variant of read_resume_file that returns an empty string on failure."""
   try:
-    if path.lower().endswith(".pdf"):
-      try:
-        from PyPDF2 import PdfReader  # type: ignore
-
-        reader = PdfReader(path)
-        text = "\n".join(page.extract_text() or "" for page in reader.pages)
-        if text.strip():
-          return text
-      except Exception:
-        pass
-
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-      return f.read()
-  except Exception:
+    return read_resume_file(path)
+  except ExtractionError as e:
+    logger.warning(f"Could not extract text from {path}: {e}")
     return ""
 
 
+def spool_stream(stream: BinaryIO) -> BinaryIO:
+  """Seekable copy of a one-way stream that stays in memory up to UPLOAD_SPOOL_MAX_MB, then moves to disk."""
+  spool = tempfile.SpooledTemporaryFile(max_size=int(extraction_config.spool_max_mb * 1024 * 1024))
+  shutil.copyfileobj(stream, spool)
+  spool.seek(0)
+  return spool
+
+
+def load_resume_text(source: ResumeSource, filename: Optional[str] = None) -> str:
+  """Extract resume text from a file path, bytes or a binary file object, skipping parsing for content seen before.
+
+  Bytes and file objects (such as uploads) are parsed in memory without a
+  temporary file; filename supplies the extension when source is not a path.
+  Raises ExtractionError if the content cannot be read or parsed.
+  """
+  if isinstance(source, str):
+    try:
+      with open(source, "rb") as f:
+        return load_resume_text(f, filename or source)
+    except OSError as e:
+      raise ExtractionError(f"Could not read file: {e.strerror or e}")
+
+  filename = filename or ""
+  if isinstance(source, bytes):
+    with span("hash"):
+      key = text_key(source, filename)
+  else:
+    if not source.seekable():
+      with span("spool"):
+        source = spool_stream(source)
+    with span("hash"):
+      key = stream_text_key(source, filename)
+
+  text = text_cache.get(key)
+  if text is None:
+    with span("extraction"):
+      text = extract_resume_text(source, filename)
+    if text.strip():
+      text_cache.set(key, text)
+  return text
+
+
 def tokenize(text: str) -> List[str]:
-  return re.findall(r"[a-zA-Z][a-zA-Z+\-#]*", text.lower())
-
-
-def extract_skill_tokens(tokens: List[str]) -> List[str]:
-  common_skill_keywords = {
-    "python",
-    "java",
-    "javascript",
-    "typescript",
-    "react",
-    "node",
-    "node.js",
-    "nextjs",
-    "next",
-    "sql",
-    "mongodb",
-    "docker",
-    "kubernetes",
-    "aws",
-    "azure",
-    "gcp",
-    "ml",
-    "machine",
-    "learning",
-    "nlp",
-    "data",
-    "analysis",
-    "django",
-    "flask",
-    "rest",
-    "api",
-  }
-  return [t for t in tokens if t in common_skill_keywords]
+  """Lowercased word, number and dotted-term tokens ("node.js", "5+") of a document."""
+  return TERM_TOKEN.findall(text.lower())
 
 
 def ratio(numerator: float, denominator: float) -> float:
@@ -75,82 +117,291 @@ def ratio(numerator: float, denominator: float) -> float:
   return max(0.0, min(1.0, numerator / denominator))
 
 
-def compute_scores(resume_text: str, jd_text: str, use_llm: bool = True) -> Dict:
-  resume_tokens = tokenize(resume_text)
-  jd_tokens = tokenize(jd_text)
+# Bump when tokenization or feature extraction changes in a way that affects scores
+FEATURES_VERSION = "2"
 
-  resume_set = set(resume_tokens)
-  jd_set = set(jd_tokens)
+# Changes whenever the skill or education dictionaries or feature extraction
+# change, invalidating anything precomputed with the old ones
+SKILLS_VERSION = f"{skill_taxonomy.version}.{FEATURES_VERSION}"
 
-  # ----- Semantic similarity using sentence-transformers (GPU if available) -----
-  device = "cuda" if torch.cuda.is_available() else "cpu"
-  model = SentenceTransformer("all-MiniLM-L6-v2", device=device)
+# Weights of the heuristic components in overallMatch
+SCORE_WEIGHTS = {
+  "semanticMatch": 0.3,
+  "skillsMatch": 0.3,
+  "experienceMatch": 0.2,
+  "educationMatch": 0.1,
+  "keywordsMatch": 0.1,
+}
 
-  with torch.no_grad():
-    emb_resume = model.encode(resume_text, convert_to_tensor=True, device=device)
-    emb_jd = model.encode(jd_text, convert_to_tensor=True, device=device)
-    cosine_sim = util.cos_sim(emb_resume, emb_jd).item()
+# A number token, optionally decimal, with "+" and a glued "years" ("5", "3.5", "5+", "10+years")
+YEARS_TOKEN = re.compile(r"(\d+(?:\.\d+)?)\+*(years?)?$")
+YEAR_WORDS = {"year", "years"}
 
-  semantic_match = max(0.0, min(1.0, cosine_sim)) * 100
 
-  resume_skills = set(extract_skill_tokens(resume_tokens))
-  jd_skills = set(extract_skill_tokens(jd_tokens))
+def extract_years(tokens: List[str]) -> int:
+  """Largest "N years" or "N+ years" mention among the document tokens."""
+  years = 0
+  for i, token in enumerate(tokens):
+    if not token[0].isdigit():
+      continue
+    m = YEARS_TOKEN.match(token)
+    if m and (m.group(2) or (i + 1 < len(tokens) and tokens[i + 1] in YEAR_WORDS)):
+      years = max(years, int(float(m.group(1))))
+  return years
+
+
+def top_keywords(token_counts: Counter, limit: int = 15) -> List[str]:
+  """Most frequent words longer than four letters, ties in order of first appearance."""
+  words = [(t, n) for t, n in token_counts.items() if len(t) > 4 and t[0].isalpha()]
+  return [k for k, _ in sorted(words, key=lambda x: -x[1])][:limit]
+
+
+def extract_features(text: str, is_jd: bool = False) -> Dict:
+  """Derive the token, skill, experience and education features of one document.
+
+  The text is lowercased and tokenized once; token counts, year mentions,
+  skills and education terms are all derived from that single token list.
+  """
+  tokens = tokenize(text)
+  token_counts = Counter(tokens)
+  terms = skill_taxonomy.match_tokens(tokens)
+  features = {
+    "tokens": tokens,
+    "token_counts": token_counts,
+    "skills": terms.get("skills", set()),
+    "years": extract_years(tokens),
+    "edu_hits": len(terms.get("education", ())),
+  }
+  if is_jd:
+    features["top_keywords"] = top_keywords(token_counts)
+  return features
 
-  matched_skills = sorted(jd_skills & resume_skills)
-  missing_skills = sorted(jd_skills - resume_skills)
 
-  skills_match = ratio(len(matched_skills), max(1, len(jd_skills))) * 100
+def _requirement_match(values: np.ndarray, required: int) -> np.ndarray:
+  if required == 0:
+    return np.where(values > 0, 100.0, 0.0)
+  return np.clip(values / required, 0.0, 1.0) * 100
 
-  def extract_years(text: str) -> int:
-    years = 0
-    for m in re.finditer(r"(\\d+)[+ ]*years?", text.lower()):
-      try:
-        years = max(years, int(m.group(1)))
-      except ValueError:
-        continue
-    return years
 
-  resume_years = extract_years(resume_text)
-  jd_years = extract_years(jd_text)
-  if jd_years == 0:
-    experience_match = 100.0 if resume_years > 0 else 0.0
-  else:
-    experience_match = ratio(resume_years, jd_years) * 100
-
-  education_keywords = [
-    "bachelor",
-    "master",
-    "b.tech",
-    "b.e",
-    "bsc",
-    "msc",
-    "phd",
-    "degree",
-  ]
-  resume_edu_hits = sum(1 for kw in education_keywords if kw in resume_text.lower())
-  jd_edu_hits = sum(1 for kw in education_keywords if kw in jd_text.lower())
-  if jd_edu_hits == 0:
-    education_match = 100.0 if resume_edu_hits > 0 else 0.0
-  else:
-    education_match = ratio(resume_edu_hits, jd_edu_hits) * 100
+def score_batch(resume_features: List[Dict], jd_features: Dict, cosine_sims: np.ndarray) -> List[Dict]:
+  """Score many resumes against one JD, computing every component as an array over the batch."""
+  n = len(resume_features)
+  if n == 0:
+    return []
 
-  jd_freq: Dict[str, int] = {}
-  for t in jd_tokens:
-    if len(t) <= 4:
-      continue
-    jd_freq[t] = jd_freq.get(t, 0) + 1
-  sorted_keywords = [k for k, _ in sorted(jd_freq.items(), key=lambda x: -x[1])]
-  top_keywords = sorted_keywords[:15]
-  matched_keywords = [k for k in top_keywords if k in resume_set]
-  keywords_match = ratio(len(matched_keywords), max(1, len(top_keywords))) * 100
-
-  overall = (
-    0.3 * semantic_match
-    + 0.3 * skills_match
-    + 0.2 * experience_match
-    + 0.1 * education_match
-    + 0.1 * keywords_match
+  semantic = np.clip(np.asarray(cosine_sims, dtype=np.float64), 0.0, 1.0) * 100
+
+  jd_skills = sorted(jd_features["skills"])
+  skill_hits = np.array(
+    [[s in f["skills"] for s in jd_skills] for f in resume_features], dtype=bool
+  ).reshape(n, len(jd_skills))
+  skills = skill_hits.sum(axis=1) / max(1, len(jd_skills)) * 100
+
+  years = np.array([f["years"] for f in resume_features], dtype=np.float64)
+  experience = _requirement_match(years, jd_features["years"])
+
+  edu_hits = np.array([f["edu_hits"] for f in resume_features], dtype=np.float64)
+  education = _requirement_match(edu_hits, jd_features["edu_hits"])
+
+  keywords = jd_features["top_keywords"]
+  keyword_hits = np.array(
+    [[k in f["token_counts"] for k in keywords] for f in resume_features], dtype=bool
+  ).reshape(n, len(keywords))
+  keywords_match = keyword_hits.sum(axis=1) / max(1, len(keywords)) * 100
+
+  components = {
+    "semanticMatch": semantic,
+    "skillsMatch": skills,
+    "experienceMatch": experience,
+    "educationMatch": education,
+    "keywordsMatch": keywords_match,
+  }
+  overall = sum(SCORE_WEIGHTS[name] * values for name, values in components.items())
+
+  results = []
+  for i in range(n):
+    row = {"overallMatch": float(overall[i])}
+    for name, values in components.items():
+      row[name] = float(values[i])
+    row["matchedSkills"] = [s for s, hit in zip(jd_skills, skill_hits[i]) if hit]
+    row["missingSkills"] = [s for s, hit in zip(jd_skills, skill_hits[i]) if not hit]
+    results.append(row)
+  return results
+
+
+def round_scores(scores: Dict) -> Dict:
+  rounded = dict(scores)
+  for name in ["overallMatch", *SCORE_WEIGHTS]:
+    rounded[name] = round(scores[name], 1)
+  return rounded
+
+
+# LLM requests run here so they overlap with embedding and heuristic scoring
+llm_executor = ThreadPoolExecutor(max_workers=llm_config.max_concurrency, thread_name_prefix="llm")
+
+_llm_stats_lock = threading.Lock()
+_llm_stats = {
+  "requests": 0,
+  "completed": 0,
+  "cached": 0,
+  "unavailable": 0,
+  "failed": 0,
+  "deadline_fallbacks": 0,
+  "prompt_tokens": 0,
+  "prompt_tokens_saved": 0,
+}
+
+# Identical concurrent analyses share one in-flight LLM call
+llm_flights = SingleFlight()
+
+
+def count_llm_outcome(outcome: str, count: int = 1) -> None:
+  with _llm_stats_lock:
+    _llm_stats[outcome] += count
+
+
+def llm_stats() -> Dict:
+  """Counts of LLM outcomes, including how often the deadline forced a traditional result."""
+  with _llm_stats_lock:
+    stats = dict(_llm_stats)
+  stats["fallback_rate"] = round(stats["deadline_fallbacks"] / stats["requests"], 4) if stats["requests"] else 0.0
+  stats["single_flight"] = llm_flights.stats()
+  return stats
+
+
+def llm_cache_key(resume_text: str, jd_text: str) -> str:
+  """Cache key of an analysis; a new prompt version, model or temperature never reuses old results."""
+  model = f"{llm_config.server_type}:{llm_config.model}"
+  version = ":".join(
+    [PROMPT_VERSION, llm_config.structured_output, str(llm_config.prompt_resume_tokens), str(llm_config.prompt_jd_tokens)]
   )
+  return llm_key(version, model, llm_config.temperature, resume_text, jd_text)
+
+
+def compact_llm_inputs(resume_text: str, jd_text: str, jd_embedding: Optional[np.ndarray] = None) -> Tuple[str, str]:
+  """Fit the resume and JD into the prompt token budgets and record the tokens saved."""
+  with span("llm_prompt_budget"):
+    resume_text, jd_text, usage = compact_prompt_texts(resume_text, jd_text, jd_embedding)
+  count_llm_outcome("prompt_tokens", usage["promptTokens"])
+  count_llm_outcome("prompt_tokens_saved", usage["tokensSaved"])
+  return resume_text, jd_text
+
+
+def time_until(deadline: Optional[float]) -> Optional[float]:
+  """Seconds left until a monotonic deadline, or None when there is no deadline."""
+  return None if deadline is None else deadline - time.monotonic()
+
+
+def request_llm_analysis(
+  resume_text: str,
+  jd_text: str,
+  deadline: Optional[float] = None,
+  jd_embedding: Optional[np.ndarray] = None,
+) -> Optional[Dict]:
+  """Return the llm_analysis block from the cache or the local LLM, or None if unavailable or failed.
+
+  deadline is a time.monotonic() value; the remaining budget is taken when
+  the call starts, so a call that waited in the executor queue past its
+  deadline raises FuturesTimeoutError without contacting the LLM.
+  """
+  timeout = time_until(deadline)
+  if timeout is not None and timeout <= 0:
+    raise FuturesTimeoutError("LLM budget spent before the request started")
+
+  if not llm_config.is_enabled():
+    count_llm_outcome("unavailable")
+    return None
+
+  key = llm_cache_key(resume_text, jd_text)
+  cached = llm_cache.get(key)
+  if cached is not None:
+    logger.info("Using cached LLM analysis")
+    count_llm_outcome("cached")
+    return cached
+
+  return llm_flights.do(key, lambda: generate_llm_analysis(resume_text, jd_text, key, deadline, jd_embedding), timeout)
+
+
+def generate_llm_analysis(
+  resume_text: str,
+  jd_text: str,
+  key: str,
+  deadline: Optional[float] = None,
+  jd_embedding: Optional[np.ndarray] = None,
+) -> Optional[Dict]:
+  """Call the local LLM with budgeted inputs and cache a successful analysis under key."""
+  llm_client = get_llm_client()
+  if not llm_client:
+    logger.info("No LLM server available, using traditional scoring")
+    count_llm_outcome("unavailable")
+    return None
+
+  resume_text, jd_text = compact_llm_inputs(resume_text, jd_text, jd_embedding)
+
+  timeout = time_until(deadline)
+  if timeout is not None and timeout <= 0:
+    raise FuturesTimeoutError("LLM budget spent before the request started")
+
+  logger.info("Generating enhanced analysis with local LLM...")
+  llm_result = llm_client.generate_analysis(resume_text, jd_text, timeout=timeout)
+  if llm_result and "llm_analysis" in llm_result:
+    logger.info("LLM analysis completed successfully")
+    count_llm_outcome("completed")
+    llm_cache.set(key, llm_result["llm_analysis"])
+    return llm_result["llm_analysis"]
+
+  logger.warning("LLM analysis failed, using traditional scoring only")
+  count_llm_outcome("failed")
+  return None
+
+
+def store_resume_embedding(resume_text: str, embedding: np.ndarray, name: Optional[str] = None) -> None:
+  """Keep an analyzed resume searchable without re-encoding it later."""
+  try:
+    metadata = {"name": name} if name else {}
+    get_resume_store().add(resume_id(resume_text), embedding, metadata)
+  except Exception as e:
+    logger.warning(f"Could not store resume embedding: {e}")
+
+
+def compute_traditional_scores(
+  resume_text: str,
+  jd_text: str,
+  resume_name: Optional[str] = None,
+  job_profile=None,
+) -> Tuple[Dict, float]:
+  """Embedding and heuristic scores without the LLM; returns the result and the unrounded overall score."""
+  with span("features"):
+    resume_features = extract_features(resume_text)
+    if job_profile is not None:
+      jd_features = job_profile.features
+    else:
+      jd_features = extract_features(jd_text, is_jd=True)
+
+  # ----- Semantic similarity using the shared sentence-transformers model -----
+  with span("embedding"):
+    if job_profile is not None:
+      # Everything about the JD was precomputed when the profile was compiled
+      resume_chunks = encode_documents([resume_text])[0]
+      jd_chunks = job_profile.chunk_embeddings()
+    else:
+      # Both texts (or all of their chunks) go through the batching stage together
+      resume_chunks, jd_chunks = encode_documents([resume_text, jd_text])
+    cosine_sim = document_similarity(resume_chunks, jd_chunks)
+    emb_resume = document_embedding(resume_chunks)
+  if storage_config.store_resumes:
+    with span("resume_store"):
+      store_resume_embedding(resume_text, emb_resume, resume_name)
+
+  with span("heuristics"):
+    scores = score_batch([resume_features], jd_features, np.array([cosine_sim]))[0]
+  overall = scores["overallMatch"]
+  semantic_match = scores["semanticMatch"]
+  skills_match = scores["skillsMatch"]
+  experience_match = scores["experienceMatch"]
+  education_match = scores["educationMatch"]
+  keywords_match = scores["keywordsMatch"]
+  missing_skills = scores["missingSkills"]
 
   strengths: List[str] = []
   recommendations: List[str] = []
@@ -186,35 +437,6 @@ def compute_scores(resume_text: str, jd_text: str, use_llm: bool = True) -> Dict
       "Your resume already aligns well. Consider minor polishing for clarity and impact."
     )
 
-  # ----- Enhanced analysis with local LLM -----
-  llm_analysis = None
-  if use_llm:
-    try:
-      llm_client = get_llm_client()
-      if llm_client:
-        logger.info("Generating enhanced analysis with local LLM...")
-        llm_result = llm_client.generate_analysis(resume_text, jd_text)
-        if llm_result and "llm_analysis" in llm_result:
-          llm_analysis = llm_result["llm_analysis"]
-          # Enhance recommendations with LLM insights
-          if "improvement_areas" in llm_analysis:
-            recommendations.extend(llm_analysis["improvement_areas"])
-          if "key_strengths" in llm_analysis:
-            strengths.extend(llm_analysis["key_strengths"])
-          
-          # Adjust overall score based on LLM recommendation
-          if "recommendation_score" in llm_analysis:
-            llm_score = llm_analysis["recommendation_score"]
-            overall = 0.7 * overall + 0.3 * llm_score
-          
-          logger.info("LLM analysis completed successfully")
-        else:
-          logger.warning("LLM analysis failed, using traditional scoring only")
-      else:
-        logger.info("No LLM server available, using traditional scoring")
-    except Exception as e:
-      logger.error(f"Error in LLM analysis: {e}")
-
   result = {
     "overallMatch": round(overall, 1),
     "semanticMatch": round(semantic_match, 1),
@@ -222,41 +444,143 @@ def compute_scores(resume_text: str, jd_text: str, use_llm: bool = True) -> Dict
     "experienceMatch": round(experience_match, 1),
     "educationMatch": round(education_match, 1),
     "keywordsMatch": round(keywords_match, 1),
-    "matchedSkills": matched_skills,
+    "matchedSkills": scores["matchedSkills"],
     "missingSkills": missing_skills,
     "recommendations": recommendations,
     "strengths": strengths,
+    "analysisMethod": "traditional",
   }
-  
-  # Add LLM analysis if available
-  if llm_analysis:
-    result["llmAnalysis"] = llm_analysis
-    result["analysisMethod"] = "enhanced_llm"
-  else:
-    result["analysisMethod"] = "traditional"
+  return result, overall
+
+
+def merge_llm_analysis(result: Dict, llm_analysis: Dict, overall: float) -> Dict:
+  """Fold the LLM insights into a traditional result, blending its score into overallMatch."""
+  merged = dict(result)
+  merged["recommendations"] = list(result["recommendations"])
+  merged["strengths"] = list(result["strengths"])
+
+  # Enhance recommendations with LLM insights
+  if "improvement_areas" in llm_analysis:
+    merged["recommendations"].extend(llm_analysis["improvement_areas"])
+  if "key_strengths" in llm_analysis:
+    merged["strengths"].extend(llm_analysis["key_strengths"])
+
+  # Adjust overall score based on LLM recommendation
+  if "recommendation_score" in llm_analysis:
+    llm_score = llm_analysis["recommendation_score"]
+    overall = 0.7 * overall + 0.3 * llm_score
 
+  merged["overallMatch"] = round(overall, 1)
+  merged["llmAnalysis"] = llm_analysis
+  merged["analysisMethod"] = "enhanced_llm"
+  return merged
+
+
+def llm_deadline_at(started: float, llm_deadline: Optional[float] = None) -> float:
+  """Monotonic time at which the LLM budget of a request that started at started runs out."""
+  return started + (llm_deadline if llm_deadline is not None else llm_config.deadline)
+
+
+def llm_time_left(started: float, llm_deadline: Optional[float] = None) -> float:
+  """Seconds left in the LLM budget of a request that started at the given monotonic time."""
+  return max(0.0, llm_deadline_at(started, llm_deadline) - time.monotonic())
+
+
+def compute_scores(
+  resume_text: str,
+  jd_text: str,
+  use_llm: bool = True,
+  resume_name: Optional[str] = None,
+  job_profile=None,
+  llm_deadline: Optional[float] = None,
+) -> Dict:
+  """Score a resume against a JD, or against a compiled job_profile when given.
+
+  The LLM request starts before any scoring so it overlaps with embedding and
+  the heuristics. If it has not finished llm_deadline seconds (default
+  LLM_DEADLINE) after the call started, the traditional result is returned.
+  """
+  started = time.monotonic()
+  if job_profile is not None:
+    jd_text = job_profile.text
+
+  llm_future = None
+  if use_llm:
+    count_llm_outcome("requests")
+    jd_embedding = job_profile.embedding if job_profile is not None else None
+    # Run in a copy of this context so the LLM stages land in the request's trace
+    llm_future = llm_executor.submit(
+      contextvars.copy_context().run,
+      request_llm_analysis, resume_text, jd_text, llm_deadline_at(started, llm_deadline), jd_embedding
+    )
+
+  result, overall = compute_traditional_scores(resume_text, jd_text, resume_name, job_profile)
+
+  # ----- Enhanced analysis with local LLM -----
+  if llm_future is None:
+    return result
+
+  remaining = llm_time_left(started, llm_deadline)
+  try:
+    with span("llm_wait"):
+      llm_analysis = llm_future.result(timeout=remaining)
+  except FuturesTimeoutError:
+    # A call still queued is dropped; one already running keeps going and fills the cache
+    llm_future.cancel()
+    logger.warning("LLM analysis missed its deadline, using traditional scoring")
+    count_llm_outcome("deadline_fallbacks")
+    result["llmFallback"] = "deadline_exceeded"
+    return result
+  except Exception as e:
+    logger.error(f"Error in LLM analysis: {e}")
+    count_llm_outcome("failed")
+    return result
+
+  if llm_analysis:
+    return merge_llm_analysis(result, llm_analysis, overall)
   return result
 
 
-def main() -> None:
-  parser = argparse.ArgumentParser(description="Resume vs JD analysis")
-  parser.add_argument("--resume", required=True, help="Path to resume file")
-  parser.add_argument("--jd", required=True, help="Job description text")
-  parser.add_argument("--no-llm", action="store_true", help="Disable LLM enhancement")
-  args = parser.parse_args()
+def run_command(request: Dict, emit: Callable[[Dict], None]) -> int:
+  """Run one CLI request, passing every JSON record to emit; returns the exit code.
 
-  if not os.path.exists(args.resume):
-    print(json.dumps({"error": "Resume file not found"}))
-    raise SystemExit(1)
+  Shared by the CLI and the analysis daemon so both print the same output.
+  """
+  if request.get("command") == "ping":
+    return 0
 
-  resume_text = load_resume_text(args.resume)
-  jd_text = args.jd
+  jd_text = request["jd"]
+  if request.get("resumes_dir"):
+    from ranking import iter_resume_files, rank_resumes
 
-  use_llm = not args.no_llm
-  result = compute_scores(resume_text, jd_text, use_llm=use_llm)
-  print(json.dumps(result))
+    if not os.path.isdir(request["resumes_dir"]):
+      emit({"error": "Resumes directory not found"})
+      return 1
+    # Stream JSONL so the first candidates print before the whole batch finishes
+    for record in rank_resumes(jd_text, iter_resume_files(request["resumes_dir"]), chunk_size=request.get("chunk_size", 64)):
+      emit(record)
+    return 0
+
+  if not os.path.exists(request["resume"]):
+    emit({"error": "Resume file not found"})
+    return 1
+
+  try:
+    resume_text = load_resume_text(request["resume"])
+  except ExtractionError as e:
+    emit({"error": f"Could not extract text from resume: {e}"})
+    return 1
+
+  emit(compute_scores(resume_text, jd_text, use_llm=request.get("use_llm", True)))
+  return 0
+
+
+def main() -> None:
+  args = build_cli_parser().parse_args()
+  code = run_command(cli_request(args), print_record)
+  if code:
+    raise SystemExit(code)
 
 
 if __name__ == "__main__":
   main()
-
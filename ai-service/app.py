@@ -1,10 +1,28 @@
 import os
-import tempfile
+import sys
 import json
 import logging
-from flask import Flask, request, jsonify
+import multiprocessing
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from werkzeug.utils import secure_filename
-from analyze import compute_scores, load_resume_text
+from analyze import compute_scores, llm_stats, load_resume_text
+from batching import encode_batcher, encode_texts
+from cache import embedding_cache, llm_cache, text_cache
+from config import embedding_config, job_config, serving_config, telemetry_config
+from extraction import ExtractionError, extract_in_parallel, pdf_extractor
+from job_catalog import job_catalog
+from job_profiles import job_profiles
+from job_queue import job_queue, new_job_id
+from job_worker import job_workers
+from local_llm import llm_health
+from metrics import metrics
+from model_registry import model_registry
+from profiler import slow_request_profiler
+from ranking import rank_resumes
+from streaming import format_sse, stream_scores
+from resume_store import get_resume_store
+from skill_taxonomy import skill_taxonomy
+from tracing import attach_timings, begin_request, end_request, span
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,6 +31,25 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Helper processes (PDF extraction, job workers) re-run the main script (this
+# module or asgi_app.py) as __mp_main__ when spawned, before parent_process()
+# is set; only the server process warms the model and starts job workers
+if sys.modules['__main__'].__name__ != '__mp_main__' and multiprocessing.parent_process() is None:
+    if serving_config.preload_model:
+        if model_registry.resolve_device() == "cpu":
+            # Load the weights before a preforking server (gunicorn.conf.py) forks, so
+            # workers share them copy-on-write; each worker warms up after the fork
+            model_registry.get_model()
+        else:
+            # CUDA cannot be re-initialized in a forked child, so every worker loads its own copy after the fork
+            logger.info(f"Not preloading the embedding model on {model_registry.resolve_device()}")
+    elif embedding_config.warmup:
+        # Load and warm the embedding model once per process, off the request path
+        model_registry.start_warmup()
+
+    # Worker processes for /jobs/analyze; each loads its own copy of the model
+    job_workers.start()
+
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'doc', 'docx'}
 
@@ -20,29 +57,120 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def extract_upload_text(filename, source):
+    """Extract text from an uploaded resume's bytes or stream in memory; raises ExtractionError on failure"""
+    return load_resume_text(source, filename)
+
+def with_timings(result):
+    """Attach the request's per-stage timings when RESPONSE_TIMINGS is on or ?timings=true is given"""
+    return attach_timings(result, request.args.get('timings', '').lower() == 'true')
+
+def collect_service_metrics():
+    """Cache, LLM, batching and job queue stats as Prometheus metrics"""
+    caches = {"text": text_cache.stats(), "embedding": embedding_cache.stats(), "llm": llm_cache.stats()}
+    yield ("ai_service_cache_hits_total", "counter", "Cache lookups answered from memory or disk", [
+        ({"cache": name, "tier": tier}, stats[f"{tier}_hits"]) for name, stats in caches.items() for tier in ("memory", "disk")
+    ])
+    yield ("ai_service_cache_misses_total", "counter", "Cache lookups that missed both tiers", [
+        ({"cache": name}, stats["misses"]) for name, stats in caches.items()
+    ])
+    yield ("ai_service_cache_hit_ratio", "gauge", "Share of cache lookups that hit since start", [
+        ({"cache": name}, stats["hit_rate"]) for name, stats in caches.items()
+    ])
+    yield ("ai_service_cache_memory_bytes", "gauge", "Bytes held by the in-process cache tier", [
+        ({"cache": name}, stats["memory"]["bytes"]) for name, stats in caches.items()
+    ])
+
+    llm = llm_stats()
+    yield ("ai_service_llm_analyses_total", "counter", "LLM analyses by outcome", [
+        ({"outcome": outcome}, llm[outcome])
+        for outcome in ("requests", "completed", "cached", "unavailable", "failed", "deadline_fallbacks")
+    ])
+    yield ("ai_service_llm_in_flight", "gauge", "Distinct LLM calls in progress", [({}, llm["single_flight"]["in_flight"])])
+
+    batching = encode_batcher.stats()
+    yield ("ai_service_encode_queue_depth", "gauge", "Texts waiting for a batched encode", [({}, batching["queue_depth"])])
+    yield ("ai_service_encode_batches_total", "counter", "Batched forward passes run", [({}, batching["batches"])])
+    yield ("ai_service_encode_items_total", "counter", "Texts encoded in batched forward passes", [({}, batching["items"])])
+
+    yield ("ai_service_jobs", "gauge", "Analysis jobs by status", [
+        ({"status": status}, count) for status, count in job_queue.stats().items()
+    ])
+    yield ("ai_service_slow_request_profiles_total", "counter", "Profiles saved for slow requests", [
+        ({}, slow_request_profiler.saved)
+    ])
+
+metrics.add_collector(collect_service_metrics)
+
+@app.before_request
+def start_request_trace():
+    g.telemetry = begin_request(request.endpoint or "unknown")
+
+@app.after_request
+def record_response_status(response):
+    g.status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_trace(error=None):
+    state = g.pop('telemetry', None)
+    if state is not None:
+        end_request(state, g.pop('status', 500))
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         "status": "healthy",
         "service": "AI Resume Analysis Service",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "models": model_registry.status(),
+        "batching": encode_batcher.stats(),
+        "caches": {
+            "text": text_cache.stats(),
+            "embedding": embedding_cache.stats(),
+            "llm": llm_cache.stats()
+        },
+        "llm": {**llm_stats(), "server": llm_health()},
+        "jobs": {**job_queue.stats(), "workers": job_workers.stats()},
+        "extraction": pdf_extractor.stats(),
+        "skills": skill_taxonomy.stats(),
+        "profiler": slow_request_profiler.stats()
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics: stage and request latency histograms, in-flight requests, cache and LLM counters"""
+    if not telemetry_config.metrics:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/analyze', methods=['POST'])
 def analyze_resume():
     """Main analysis endpoint"""
     try:
+        # Parsing the multipart body is where werkzeug spools large uploads to a temporary file
+        with span("upload"):
+            files = request.files
+        
         # Check if request contains file and job description
-        if 'resume' not in request.files:
+        if 'resume' not in files:
             return jsonify({"error": "No resume file provided"}), 400
         
-        if 'jobDescription' not in request.form:
+        job_id = request.form.get('jobId')
+        if 'jobDescription' not in request.form and not job_id:
             return jsonify({"error": "No job description provided"}), 400
         
-        file = request.files['resume']
-        job_description = request.form['jobDescription']
+        file = files['resume']
+        job_description = request.form.get('jobDescription', '')
         use_llm = request.form.get('use_llm', 'true').lower() == 'true'
+        llm_deadline = request.form.get('llmDeadline', type=float)
+        
+        job_profile = None
+        if job_id:
+            job_profile = job_profiles.get(job_id)
+            if job_profile is None:
+                return jsonify({"error": "Unknown jobId"}), 404
         
         # Validate file
         if file.filename == '':
@@ -53,33 +181,24 @@ def analyze_resume():
                 "error": "File type not allowed. Allowed types: txt, pdf, doc, docx"
             }), 400
         
-        # Save file temporarily
         filename = secure_filename(file.filename)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=filename) as temp_file:
-            file.save(temp_file.name)
-            temp_path = temp_file.name
+        resume_text = extract_upload_text(filename, file.stream)
         
-        try:
-            # Load resume text
-            resume_text = load_resume_text(temp_path)
-            
-            if not resume_text.strip():
-                return jsonify({"error": "Could not extract text from resume file"}), 400
-            
-            # Perform analysis
-            logger.info(f"Analyzing resume: {filename}")
-            result = compute_scores(resume_text, job_description, use_llm=use_llm)
-            
-            logger.info(f"Analysis completed. Overall match: {result['overallMatch']}%")
-            return jsonify(result)
-            
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_path)
-            except OSError:
-                pass
+        if not resume_text.strip():
+            return jsonify({"error": "Could not extract text from resume file"}), 400
+        
+        # Perform analysis
+        logger.info(f"Analyzing resume: {filename}")
+        result = compute_scores(
+            resume_text, job_description, use_llm=use_llm, resume_name=filename,
+            job_profile=job_profile, llm_deadline=llm_deadline
+        )
+        
+        logger.info(f"Analysis completed. Overall match: {result['overallMatch']}%")
+        return jsonify(with_timings(result))
                 
+    except ExtractionError as e:
+        return jsonify({"error": f"Could not extract text from resume file: {e}"}), 400
     except Exception as e:
         logger.error(f"Error during analysis: {str(e)}")
         return jsonify({"error": "Internal server error during analysis"}), 500
@@ -95,25 +214,373 @@ def analyze_text():
         
         resume_text = data.get('resumeText', '')
         job_description = data.get('jobDescription', '')
+        job_id = data.get('jobId')
         use_llm = data.get('use_llm', True)
+        llm_deadline = data.get('llmDeadline')
+        if llm_deadline is not None:
+            try:
+                llm_deadline = float(llm_deadline)
+            except (TypeError, ValueError):
+                return jsonify({"error": "llmDeadline must be a number"}), 400
         
         if not resume_text.strip():
             return jsonify({"error": "Resume text is required"}), 400
         
-        if not job_description.strip():
+        job_profile = None
+        if job_id:
+            job_profile = job_profiles.get(str(job_id))
+            if job_profile is None:
+                return jsonify({"error": "Unknown jobId"}), 404
+        elif not job_description.strip():
             return jsonify({"error": "Job description is required"}), 400
         
         # Perform analysis
         logger.info("Analyzing resume text")
-        result = compute_scores(resume_text, job_description, use_llm=use_llm)
+        result = compute_scores(
+            resume_text, job_description, use_llm=use_llm,
+            job_profile=job_profile, llm_deadline=llm_deadline
+        )
         
         logger.info(f"Analysis completed. Overall match: {result['overallMatch']}%")
-        return jsonify(result)
+        return jsonify(with_timings(result))
         
     except Exception as e:
         logger.error(f"Error during text analysis: {str(e)}")
         return jsonify({"error": "Internal server error during analysis"}), 500
 
+@app.route('/analyze-stream', methods=['POST'])
+def analyze_stream():
+    """Stream analysis results as Server-Sent Events: heuristic scores first, LLM analysis after"""
+    try:
+        if request.is_json:
+            data = request.get_json() or {}
+            resume_text = data.get('resumeText', '')
+            resume_name = None
+        else:
+            data = request.form
+            file = request.files.get('resume')
+            if file is None or file.filename == '':
+                return jsonify({"error": "No resume file provided"}), 400
+            if not allowed_file(file.filename):
+                return jsonify({
+                    "error": "File type not allowed. Allowed types: txt, pdf, doc, docx"
+                }), 400
+            resume_name = secure_filename(file.filename)
+            resume_text = extract_upload_text(resume_name, file.stream)
+        
+        job_description = data.get('jobDescription', '')
+        job_id = data.get('jobId')
+        use_llm = str(data.get('use_llm', 'true')).lower() == 'true'
+        llm_deadline = data.get('llmDeadline')
+        if llm_deadline is not None:
+            try:
+                llm_deadline = float(llm_deadline)
+            except (TypeError, ValueError):
+                return jsonify({"error": "llmDeadline must be a number"}), 400
+        
+        if not isinstance(resume_text, str) or not isinstance(job_description, str):
+            return jsonify({"error": "resumeText and jobDescription must be strings"}), 400
+        
+        if not resume_text.strip():
+            return jsonify({"error": "Could not extract text from resume"}), 400
+        
+        job_profile = None
+        if job_id:
+            job_profile = job_profiles.get(str(job_id))
+            if job_profile is None:
+                return jsonify({"error": "Unknown jobId"}), 404
+        elif not job_description.strip():
+            return jsonify({"error": "Job description is required"}), 400
+    except ExtractionError as e:
+        return jsonify({"error": f"Could not extract text from resume file: {e}"}), 400
+
+    def generate():
+        try:
+            for event, payload in stream_scores(
+                resume_text, job_description, use_llm=use_llm, resume_name=resume_name,
+                job_profile=job_profile, llm_deadline=llm_deadline
+            ):
+                yield format_sse(event, payload)
+        except Exception as e:
+            logger.error(f"Error during streamed analysis: {str(e)}")
+            yield format_sse("error", {"error": "Internal server error during analysis"})
+
+    logger.info("Streaming resume analysis")
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/rank', methods=['POST'])
+def rank():
+    """Rank many resumes against one job description, streamed back as JSONL"""
+    try:
+        if request.is_json:
+            data = request.get_json() or {}
+            job_description = data.get('jobDescription', '')
+            chunk_size = int(data.get('chunkSize', 64))
+            resumes = [
+                (str(item.get('id', i)), item.get('text', ''))
+                for i, item in enumerate(data.get('resumes', []))
+            ]
+        else:
+            job_description = request.form.get('jobDescription', '')
+            chunk_size = int(request.form.get('chunkSize', 64))
+            files = [f for f in request.files.getlist('resumes') if f.filename]
+            for f in files:
+                if not allowed_file(f.filename):
+                    return jsonify({
+                        "error": f"File type not allowed: {f.filename}"
+                    }), 400
+            # Read the uploads now but extract in parallel while earlier chunks
+            # are scored; failed files are reported as error records
+            uploads = [(f.filename, (f.filename, f.read())) for f in files]
+            resumes = extract_in_parallel(lambda upload: extract_upload_text(*upload), uploads) if uploads else []
+
+        if not job_description.strip():
+            return jsonify({"error": "Job description is required"}), 400
+
+        if not resumes:
+            return jsonify({"error": "At least one resume is required"}), 400
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({"error": "Invalid ranking request"}), 400
+
+    def generate():
+        try:
+            for record in rank_resumes(job_description, resumes, chunk_size=chunk_size):
+                yield json.dumps(record) + "\n"
+        except Exception as e:
+            logger.error(f"Error during ranking: {str(e)}")
+            yield json.dumps({"type": "error", "error": "Internal server error during ranking"}) + "\n"
+
+    logger.info("Ranking resumes against job description")
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/jobs', methods=['POST'])
+def register_job():
+    """Compile a job description once so resumes can be scored against its jobId"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        job_description = data.get('jobDescription', '')
+        if not job_description.strip():
+            return jsonify({"error": "Job description is required"}), 400
+        
+        profile = job_profiles.register(job_description)
+        return jsonify(profile.summary()), 201
+        
+    except Exception as e:
+        logger.error(f"Error registering job: {str(e)}")
+        return jsonify({"error": "Internal server error while registering job"}), 500
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """List registered job profiles"""
+    return jsonify({"count": len(job_profiles), "jobs": job_profiles.list_profiles()})
+
+@app.route('/jobs/analyze', methods=['POST'])
+def submit_analysis_job():
+    """Queue a bulk analysis of many resumes against one job description"""
+    try:
+        # Named analysisId in the API: jobId means a registered job profile
+        analysis_id = new_job_id()
+        files = []
+        if request.is_json:
+            data = request.get_json() or {}
+            resumes = [
+                {"id": str(item.get('id', i)), "text": item.get('text', '')}
+                for i, item in enumerate(data.get('resumes', []))
+            ]
+        else:
+            data = request.form
+            files = [f for f in request.files.getlist('resumes') if f.filename]
+            for f in files:
+                if not allowed_file(f.filename):
+                    return jsonify({
+                        "error": f"File type not allowed: {f.filename}"
+                    }), 400
+            resumes = []
+        
+        job_description = data.get('jobDescription', '')
+        profile_id = data.get('jobId')
+        if profile_id:
+            if job_profiles.get(str(profile_id)) is None:
+                return jsonify({"error": "Unknown jobId"}), 404
+        elif not job_description.strip():
+            return jsonify({"error": "Job description is required"}), 400
+        
+        if not resumes and not files:
+            return jsonify({"error": "At least one resume is required"}), 400
+        chunk_size = int(data.get('chunkSize', 64))
+        
+        if files:
+            # Uploads are kept on disk with the job until a worker has processed it
+            upload_dir = os.path.join(job_config.upload_dir, analysis_id)
+            os.makedirs(upload_dir, exist_ok=True)
+            for i, f in enumerate(files):
+                path = os.path.join(upload_dir, f"{i}_{secure_filename(f.filename)}")
+                f.save(path)
+                resumes.append({"id": f.filename, "path": path})
+        
+        payload = {
+            "jobDescription": job_description,
+            "jobId": profile_id,
+            "resumes": resumes,
+            "useLLM": str(data.get('useLLM', 'false')).lower() == 'true',
+            "chunkSize": chunk_size,
+        }
+        job_queue.enqueue(payload, analysis_id)
+        logger.info(f"Queued analysis job {analysis_id} with {len(resumes)} resumes")
+        return jsonify({
+            "analysisId": analysis_id,
+            "status": "queued",
+            "statusUrl": f"/jobs/analyze/{analysis_id}",
+        }), 202
+        
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({"error": "Invalid analysis job request"}), 400
+    except Exception as e:
+        logger.error(f"Error queueing analysis job: {str(e)}")
+        return jsonify({"error": "Internal server error while queueing job"}), 500
+
+@app.route('/jobs/analyze/<analysis_id>', methods=['GET'])
+def get_analysis_job(analysis_id):
+    """Status, progress and results of a queued analysis job"""
+    job = job_queue.get(analysis_id)
+    if job is None:
+        return jsonify({"error": "Analysis not found"}), 404
+    job["analysisId"] = job.pop("jobId")
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """A registered job profile, or an analysis job under its older status URL"""
+    profile = job_profiles.get(job_id)
+    if profile is not None:
+        return jsonify(profile.summary())
+    # Analyses queued before statusUrl moved to /jobs/analyze/<analysisId>
+    if job_queue.get(job_id) is not None:
+        return get_analysis_job(job_id)
+    return jsonify({"error": "Job not found"}), 404
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def remove_job(job_id):
+    """Delete a registered job profile"""
+    if not job_profiles.remove(job_id):
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"removed": job_id, "count": len(job_profiles)})
+
+@app.route('/catalog', methods=['GET'])
+def list_catalog():
+    """List the job descriptions in the matching catalog"""
+    return jsonify({"count": len(job_catalog), "jobs": job_catalog.list_jobs()})
+
+@app.route('/catalog', methods=['POST'])
+def add_to_catalog():
+    """Add or replace job descriptions in the matching catalog"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('jobs'), list):
+            return jsonify({"error": "A list of jobs is required"}), 400
+        
+        jobs = data['jobs']
+        for job in jobs:
+            if not isinstance(job, dict) or 'id' not in job or not str(job.get('description', '')).strip():
+                return jsonify({"error": "Each job needs an id and a description"}), 400
+        
+        ids = job_catalog.add_jobs(jobs)
+        logger.info(f"Added {len(ids)} jobs to catalog")
+        return jsonify({"added": ids, "count": len(job_catalog)})
+        
+    except Exception as e:
+        logger.error(f"Error adding jobs to catalog: {str(e)}")
+        return jsonify({"error": "Internal server error while updating catalog"}), 500
+
+@app.route('/catalog/<job_id>', methods=['DELETE'])
+def remove_from_catalog(job_id):
+    """Remove a job description from the matching catalog"""
+    if not job_catalog.remove_job(job_id):
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"removed": job_id, "count": len(job_catalog)})
+
+@app.route('/match-jobs', methods=['POST'])
+def match_jobs():
+    """Rank catalog jobs for one resume (file upload or JSON text)"""
+    try:
+        if request.is_json:
+            data = request.get_json() or {}
+            resume_text = data.get('resumeText', '')
+            top_k = int(data.get('topK', 10))
+        else:
+            if 'resume' not in request.files or request.files['resume'].filename == '':
+                return jsonify({"error": "No resume file provided"}), 400
+            file = request.files['resume']
+            if not allowed_file(file.filename):
+                return jsonify({
+                    "error": "File type not allowed. Allowed types: txt, pdf, doc, docx"
+                }), 400
+            resume_text = extract_upload_text(file.filename, file.stream)
+            top_k = int(request.form.get('topK', 10))
+        
+        if not resume_text.strip():
+            return jsonify({"error": "Resume text is required"}), 400
+        
+        matches = job_catalog.match(resume_text, top_k=max(1, top_k))
+        logger.info(f"Matched resume against {len(job_catalog)} catalog jobs")
+        return jsonify({"catalogSize": len(job_catalog), "matches": matches})
+        
+    except ValueError:
+        return jsonify({"error": "topK must be an integer"}), 400
+    except ExtractionError as e:
+        return jsonify({"error": f"Could not extract text from resume file: {e}"}), 400
+    except Exception as e:
+        logger.error(f"Error during job matching: {str(e)}")
+        return jsonify({"error": "Internal server error during job matching"}), 500
+
+@app.route('/search-resumes', methods=['POST'])
+def search_resumes():
+    """Find the stored resumes closest to a job description"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        job_description = data.get('jobDescription', '')
+        if not job_description.strip():
+            return jsonify({"error": "Job description is required"}), 400
+        
+        top_k = max(1, int(data.get('topK', 10)))
+        approximate = bool(data.get('approximate', False))
+        
+        # Only the JD is encoded; stored resumes are searched by their saved embeddings
+        query = encode_texts([job_description])[0]
+        store = get_resume_store()
+        results = store.search(query, top_k=top_k, approximate=approximate)
+        return jsonify({"storeSize": len(store), "results": results})
+        
+    except ValueError:
+        return jsonify({"error": "topK must be an integer"}), 400
+    except Exception as e:
+        logger.error(f"Error during resume search: {str(e)}")
+        return jsonify({"error": "Internal server error during resume search"}), 500
+
+@app.route('/search-resumes/index', methods=['POST'])
+def build_resume_index():
+    """Rebuild the approximate search index over the stored resumes"""
+    try:
+        data = request.get_json(silent=True) or {}
+        n_lists = data.get('lists')
+        info = get_resume_store().build_index(n_lists=int(n_lists) if n_lists else None)
+        return jsonify(info)
+    except Exception as e:
+        logger.error(f"Error building resume index: {str(e)}")
+        return jsonify({"error": "Internal server error while building index"}), 500
+
 @app.errorhandler(413)
 def too_large(e):
     return jsonify({"error": "File too large. Maximum size is 16MB"}), 413
@@ -0,0 +1,212 @@
+import functools
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.datastructures import UploadFile
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+from werkzeug.utils import secure_filename
+
+from analyze import load_resume_text
+from app import allowed_file
+from app import app as flask_app
+from async_scoring import ExecutorSaturated, compute_scores_async, cpu_executor
+from extraction import ExtractionError
+from job_profiles import job_profiles
+from local_llm import close_async_client
+from metrics import metrics
+from tracing import attach_timings, begin_request, end_request, span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_CONTENT_LENGTH = flask_app.config['MAX_CONTENT_LENGTH']
+
+
+def error_response(message: str, status: int) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status)
+
+
+def busy_response() -> JSONResponse:
+    return JSONResponse({"error": "Server is busy, retry shortly"}, status_code=503, headers={"Retry-After": "1"})
+
+
+def timings_requested(request: Request) -> bool:
+    return request.query_params.get('timings', '').lower() == 'true'
+
+
+def traced_endpoint(handler):
+    """Trace an async endpoint under the same name as its Flask counterpart"""
+
+    @functools.wraps(handler)
+    async def wrapper(request: Request):
+        state = begin_request(handler.__name__, profile=False)
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status_code
+            return response
+        finally:
+            end_request(state, status)
+
+    return wrapper
+
+
+@traced_endpoint
+async def analyze_resume(request: Request):
+    """Main analysis endpoint"""
+    form = None
+    try:
+        if int(request.headers.get('content-length') or 0) > MAX_CONTENT_LENGTH:
+            return error_response("File too large. Maximum size is 16MB", 413)
+
+        # Multipart parsing spools large uploads to a temporary file
+        with span("upload"):
+            form = await request.form()
+
+        file = form.get('resume')
+        if not isinstance(file, UploadFile):
+            return error_response("No resume file provided", 400)
+
+        job_id = form.get('jobId')
+        if 'jobDescription' not in form and not job_id:
+            return error_response("No job description provided", 400)
+
+        job_description = form.get('jobDescription', '')
+        use_llm = str(form.get('use_llm', 'true')).lower() == 'true'
+        try:
+            llm_deadline = float(form['llmDeadline']) if 'llmDeadline' in form else None
+        except ValueError:
+            llm_deadline = None
+
+        job_profile = None
+        if job_id:
+            job_profile = job_profiles.get(job_id)
+            if job_profile is None:
+                return error_response("Unknown jobId", 404)
+
+        # Validate file
+        if not file.filename:
+            return error_response("No file selected", 400)
+
+        if not allowed_file(file.filename):
+            return error_response("File type not allowed. Allowed types: txt, pdf, doc, docx", 400)
+
+        filename = secure_filename(file.filename)
+        resume_text = await cpu_executor.run(load_resume_text, file.file, filename)
+
+        if not resume_text.strip():
+            return error_response("Could not extract text from resume file", 400)
+
+        # Perform analysis
+        logger.info(f"Analyzing resume: {filename}")
+        result = await compute_scores_async(
+            resume_text, job_description, use_llm=use_llm, resume_name=filename,
+            job_profile=job_profile, llm_deadline=llm_deadline, admitted=True
+        )
+
+        logger.info(f"Analysis completed. Overall match: {result['overallMatch']}%")
+        return JSONResponse(attach_timings(result, timings_requested(request)))
+
+    except ExecutorSaturated:
+        return busy_response()
+    except ExtractionError as e:
+        return error_response(f"Could not extract text from resume file: {e}", 400)
+    except Exception as e:
+        logger.error(f"Error during analysis: {str(e)}")
+        return error_response("Internal server error during analysis", 500)
+    finally:
+        if form is not None:
+            await form.close()
+
+
+@traced_endpoint
+async def analyze_text(request: Request):
+    """Analyze resume text directly (no file upload)"""
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+
+        if not data:
+            return error_response("No JSON data provided", 400)
+
+        resume_text = data.get('resumeText', '')
+        job_description = data.get('jobDescription', '')
+        job_id = data.get('jobId')
+        use_llm = data.get('use_llm', True)
+        llm_deadline = data.get('llmDeadline')
+        if llm_deadline is not None:
+            try:
+                llm_deadline = float(llm_deadline)
+            except (TypeError, ValueError):
+                return error_response("llmDeadline must be a number", 400)
+
+        if not resume_text.strip():
+            return error_response("Resume text is required", 400)
+
+        job_profile = None
+        if job_id:
+            job_profile = job_profiles.get(str(job_id))
+            if job_profile is None:
+                return error_response("Unknown jobId", 404)
+        elif not job_description.strip():
+            return error_response("Job description is required", 400)
+
+        # Perform analysis
+        logger.info("Analyzing resume text")
+        result = await compute_scores_async(
+            resume_text, job_description, use_llm=use_llm,
+            job_profile=job_profile, llm_deadline=llm_deadline
+        )
+
+        logger.info(f"Analysis completed. Overall match: {result['overallMatch']}%")
+        return JSONResponse(attach_timings(result, timings_requested(request)))
+
+    except ExecutorSaturated:
+        return busy_response()
+    except Exception as e:
+        logger.error(f"Error during text analysis: {str(e)}")
+        return error_response("Internal server error during analysis", 500)
+
+
+def collect_executor_metrics():
+    """Load on the CPU executor of the async server"""
+    stats = cpu_executor.stats()
+    yield ("ai_service_cpu_jobs_outstanding", "gauge", "CPU jobs running or queued on the async executor", [({}, stats["outstanding"])])
+    yield ("ai_service_cpu_jobs_rejected_total", "counter", "Requests answered 503 because the CPU queue was full", [({}, stats["rejected"])])
+
+
+metrics.add_collector(collect_executor_metrics)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await close_async_client()
+
+
+# /analyze and /analyze-text run on the event loop; every other endpoint is
+# served by the Flask app on a thread, so the API is the same in both modes
+app = Starlette(
+    routes=[
+        Route('/analyze', analyze_resume, methods=['POST']),
+        Route('/analyze-text', analyze_text, methods=['POST']),
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.environ.get('PORT', 5000))
+    logger.info(f"Starting AI Resume Analysis Service (async) on port {port}")
+    uvicorn.run(app, host='0.0.0.0', port=port)
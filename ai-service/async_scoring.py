@@ -0,0 +1,205 @@
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from analyze import (
+    compact_llm_inputs,
+    compute_traditional_scores,
+    count_llm_outcome,
+    llm_cache_key,
+    llm_deadline_at,
+    llm_time_left,
+    merge_llm_analysis,
+    time_until,
+)
+from cache import llm_cache
+from config import llm_config, serving_config
+from local_llm import get_llm_client
+from tracing import span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the CPU executor already has as many jobs as it may queue"""
+
+
+class BoundedExecutor:
+    """Thread pool that keeps CPU-bound work off the event loop, with a cap on queued jobs
+
+    Beyond workers + max_queued outstanding bounded jobs, run raises
+    ExecutorSaturated so the server can shed load with a 503 instead of
+    building an unbounded backlog whose requests would all miss their deadline.
+    """
+
+    def __init__(self, workers: int, max_queued: int):
+        self.workers = max(1, workers)
+        self.max_queued = max(0, max_queued)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cpu-worker")
+        # Only touched from the event loop thread, so no lock
+        self._outstanding = 0
+        self._bounded = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable, *args, bounded: bool = True):
+        """Run fn(*args) on a worker thread in a copy of the caller's context, so spans reach its trace
+
+        Follow-up jobs of a request that was already admitted pass bounded=False
+        so they queue rather than fail it halfway through; they do not count
+        against the cap.
+        """
+        if bounded:
+            if self._bounded >= self.workers + self.max_queued:
+                self.rejected += 1
+                raise ExecutorSaturated(f"{self._bounded} CPU jobs outstanding")
+            self._bounded += 1
+        self._outstanding += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, contextvars.copy_context().run, fn, *args)
+        finally:
+            self._outstanding -= 1
+            if bounded:
+                self._bounded -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            "outstanding": self._outstanding,
+            "rejected": self.rejected,
+        }
+
+
+# Global CPU executor of the async server
+cpu_executor = BoundedExecutor(serving_config.cpu_workers, serving_config.cpu_queue)
+
+# At most max_concurrency LLM calls at once, like the sync path's llm_executor
+_llm_slots = asyncio.Semaphore(llm_config.max_concurrency)
+
+# Identical concurrent analyses share one in-flight LLM task (the async counterpart of llm_flights)
+_llm_tasks: Dict[str, asyncio.Task] = {}
+
+
+async def _generate_llm_analysis(
+    resume_text: str,
+    jd_text: str,
+    key: str,
+    deadline: float,
+    jd_embedding: Optional[np.ndarray] = None,
+) -> Optional[Dict]:
+    llm_client = get_llm_client()
+    if not llm_client:
+        logger.info("No LLM server available, using traditional scoring")
+        count_llm_outcome("unavailable")
+        return None
+
+    # Section ranking encodes both texts, so it runs on the CPU executor
+    resume_text, jd_text = await cpu_executor.run(compact_llm_inputs, resume_text, jd_text, jd_embedding, bounded=False)
+
+    async with _llm_slots:
+        # The budget is taken once a slot is free, so a call that queued past its deadline is skipped
+        timeout = time_until(deadline)
+        if timeout <= 0:
+            raise asyncio.TimeoutError("LLM budget spent before the request started")
+        llm_result = await llm_client.agenerate_analysis(resume_text, jd_text, timeout=timeout)
+    if llm_result and "llm_analysis" in llm_result:
+        count_llm_outcome("completed")
+        llm_cache.set(key, llm_result["llm_analysis"])
+        return llm_result["llm_analysis"]
+
+    logger.warning("LLM analysis failed, using traditional scoring only")
+    count_llm_outcome("failed")
+    return None
+
+
+async def request_llm_analysis_async(
+    resume_text: str,
+    jd_text: str,
+    deadline: float,
+    jd_embedding: Optional[np.ndarray] = None,
+) -> Optional[Dict]:
+    """Async counterpart of request_llm_analysis: the cached analysis, or one from the LLM, or None"""
+    if not llm_config.is_enabled():
+        count_llm_outcome("unavailable")
+        return None
+
+    key = llm_cache_key(resume_text, jd_text)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        count_llm_outcome("cached")
+        return cached
+
+    task = _llm_tasks.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_generate_llm_analysis(resume_text, jd_text, key, deadline, jd_embedding))
+        _llm_tasks[key] = task
+        task.add_done_callback(lambda _: _llm_tasks.pop(key, None))
+    # A caller that stops waiting must not cancel the call other requests share
+    return await asyncio.shield(task)
+
+
+async def compute_scores_async(
+    resume_text: str,
+    jd_text: str,
+    use_llm: bool = True,
+    resume_name: Optional[str] = None,
+    job_profile=None,
+    llm_deadline: Optional[float] = None,
+    admitted: bool = False,
+) -> Dict:
+    """Async counterpart of compute_scores with the same result and LLM deadline semantics
+
+    Scoring runs on the bounded CPU executor while the LLM request is awaited
+    on the event loop, so a slow LLM ties up a socket rather than a thread.
+    Raises ExecutorSaturated when the executor's queue is full, unless the
+    caller already got a job through it (admitted=True).
+    """
+    started = time.monotonic()
+    if job_profile is not None:
+        jd_text = job_profile.text
+
+    llm_task = None
+    if use_llm:
+        count_llm_outcome("requests")
+        jd_embedding = job_profile.embedding if job_profile is not None else None
+        llm_task = asyncio.ensure_future(
+            request_llm_analysis_async(resume_text, jd_text, llm_deadline_at(started, llm_deadline), jd_embedding)
+        )
+
+    try:
+        result, overall = await cpu_executor.run(
+            compute_traditional_scores, resume_text, jd_text, resume_name, job_profile, bounded=not admitted
+        )
+    except BaseException:
+        if llm_task is not None:
+            llm_task.cancel()
+        raise
+
+    if llm_task is None:
+        return result
+
+    try:
+        with span("llm_wait"):
+            llm_analysis = await asyncio.wait_for(llm_task, llm_time_left(started, llm_deadline))
+    except asyncio.TimeoutError:
+        # The shared LLM task keeps running and fills the cache; we just stop waiting for it
+        logger.warning("LLM analysis missed its deadline, using traditional scoring")
+        count_llm_outcome("deadline_fallbacks")
+        result["llmFallback"] = "deadline_exceeded"
+        return result
+    except Exception as e:
+        logger.error(f"Error in LLM analysis: {e}")
+        count_llm_outcome("failed")
+        return result
+
+    if llm_analysis:
+        return merge_llm_analysis(result, llm_analysis, overall)
+    return result
@@ -0,0 +1,177 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from cache import embedding_cache, embedding_key
+from config import embedding_config
+from model_registry import model_registry
+from tracing import span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+class EncodeBatcher:
+    """Background stage that merges encode jobs from concurrent requests into batched forward passes"""
+
+    def __init__(self, model_name: Optional[str] = None, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.model_name = model_name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._encode_seconds = 0.0
+        self._histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self._histogram["+Inf"] = 0
+
+    def _ensure_started(self) -> None:
+        """Start the dispatcher thread on first use"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="encode-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a single text for encoding and return a future for its embedding"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts through the shared batch and wait for their embeddings"""
+        futures = [self.submit(text) for text in texts]
+        return np.stack([future.result() for future in futures])
+
+    def _collect(self) -> List:
+        """Block for one job, then gather more until the batch is full or the wait expires"""
+        jobs = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(jobs) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    jobs.append(self._queue.get_nowait())
+                else:
+                    jobs.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return jobs
+
+    def _run(self) -> None:
+        """Dispatcher loop"""
+        while True:
+            jobs = self._collect()
+            texts = [text for text, _ in jobs]
+            start = time.perf_counter()
+            try:
+                model = model_registry.get_model(self.model_name)
+                with span("model_encode"):
+                    embeddings = model.encode(
+                        texts,
+                        batch_size=len(texts),
+                        convert_to_numpy=True,
+                        normalize_embeddings=True,
+                        show_progress_bar=False,
+                    )
+            except Exception as e:
+                logger.error(f"Batched encode of {len(texts)} texts failed: {e}")
+                for _, future in jobs:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(jobs, embeddings):
+                future.set_result(embedding.astype(np.float32, copy=False))
+            self._record(len(texts), time.perf_counter() - start)
+
+    def _record(self, batch_size: int, seconds: float) -> None:
+        """Update batch metrics"""
+        with self._stats_lock:
+            self._batches += 1
+            self._items += batch_size
+            self._max_batch = max(self._max_batch, batch_size)
+            self._encode_seconds += seconds
+            for bucket in BATCH_SIZE_BUCKETS:
+                if batch_size <= bucket:
+                    self._histogram[bucket] += 1
+                    break
+            else:
+                self._histogram["+Inf"] += 1
+
+    def stats(self) -> Dict:
+        """Get queue depth and batch size metrics"""
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "max_batch_size": self._max_batch,
+                "encode_seconds": round(self._encode_seconds, 3),
+                "batch_size_histogram": {str(k): v for k, v in self._histogram.items()},
+                "config": {
+                    "max_batch_size": self.max_batch_size,
+                    "max_wait_ms": self.max_wait * 1000.0,
+                },
+            }
+
+
+# Global batcher instance
+encode_batcher = EncodeBatcher(
+    max_batch_size=embedding_config.batch_max_size,
+    max_wait_ms=embedding_config.batch_max_wait_ms,
+)
+
+
+def _encode_uncached(texts: List[str]) -> np.ndarray:
+    if embedding_config.batching:
+        return encode_batcher.encode(texts)
+
+    model = model_registry.get_model()
+    with span("model_encode"):
+        embeddings = model.encode(
+            texts,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+    return embeddings.astype(np.float32, copy=False)
+
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """Encode texts into L2-normalized float32 embeddings, one row per text
+
+    Embeddings are looked up in the content-addressed cache first, so only
+    texts that were never encoded with the current model and backend reach
+    the model.
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    keys = [embedding_key(embedding_config.model_identity(), text) for text in texts]
+    embeddings: List[Optional[np.ndarray]] = [embedding_cache.get(key) for key in keys]
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        encoded = _encode_uncached([texts[i] for i in missing])
+        for i, embedding in zip(missing, encoded):
+            # Copy so a cached row does not pin the whole batch array in memory
+            embedding = np.array(embedding, dtype=np.float32)
+            embeddings[i] = embedding
+            embedding_cache.set(keys[i], embedding)
+    return np.stack(embeddings)
@@ -0,0 +1,138 @@
+import argparse
+import os
+import random
+from typing import List, Tuple
+
+# Roughly one printed page of resume text
+LINES_PER_PAGE = 48
+
+SKILLS = [
+    "Python", "Java", "TypeScript", "React", "Node.js", "Django", "Flask", "PostgreSQL", "MongoDB",
+    "Redis", "Docker", "Kubernetes", "Terraform", "AWS", "Azure", "GCP", "Kafka", "Spark", "Airflow",
+    "machine learning", "NLP", "PyTorch", "scikit-learn", "pandas", "GraphQL", "REST APIs", "CI/CD",
+]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Shipped", "Maintained", "Scaled"]
+OBJECTS = [
+    "a payments platform", "the customer data pipeline", "an internal analytics dashboard",
+    "a recommendation service", "the search backend", "a fraud detection model", "the mobile API gateway",
+    "an event streaming platform", "the reporting warehouse", "a document processing service",
+]
+OUTCOMES = [
+    "cutting p95 latency by {n}%", "serving {n}k requests per second", "reducing cloud spend by {n}%",
+    "improving conversion by {n}%", "onboarding {n} enterprise customers", "raising test coverage to {n}%",
+]
+TITLES = ["Software Engineer", "Backend Engineer", "Data Engineer", "Machine Learning Engineer", "Platform Engineer"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Tech", "Hooli"]
+DEGREES = ["Bachelor of Science in Computer Science", "Master of Science in Data Science", "B.Tech in Information Technology"]
+
+
+def _bullet(rng: random.Random) -> str:
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 90))
+    skills = " and ".join(rng.sample(SKILLS, 2))
+    return f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {skills}, {outcome}."
+
+
+def make_resume(pages: int, seed: int = 0) -> List[str]:
+    """Deterministic synthetic resume of about the given number of pages, as lines"""
+    rng = random.Random(f"resume-{pages}-{seed}")
+    lines = [
+        f"Candidate {seed}",
+        "SUMMARY",
+        f"{rng.choice(TITLES)} with {rng.randint(2, 15)}+ years of experience in {', '.join(rng.sample(SKILLS, 4))}.",
+        "",
+        "SKILLS",
+        ", ".join(rng.sample(SKILLS, 10)),
+        "",
+        "EXPERIENCE",
+    ]
+    body_lines = pages * LINES_PER_PAGE - 6
+    while len(lines) < body_lines:
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({rng.randint(2008, 2024)})")
+        lines.extend(_bullet(rng) for _ in range(rng.randint(3, 6)))
+        lines.append("")
+    lines = lines[:body_lines]
+    lines.extend(["", "EDUCATION", rng.choice(DEGREES), f"Graduated {rng.randint(2005, 2020)}", "", "References available on request."])
+    return lines
+
+
+def make_jd(seed: int = 0) -> str:
+    """Deterministic synthetic job description"""
+    rng = random.Random(f"jd-{seed}")
+    lines = [
+        f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)}",
+        "RESPONSIBILITIES",
+        *(_bullet(rng) for _ in range(6)),
+        "REQUIREMENTS",
+        f"- {rng.randint(2, 8)}+ years of professional experience.",
+        f"- Strong skills in {', '.join(rng.sample(SKILLS, 6))}.",
+        "- Bachelor's degree in Computer Science or a related field.",
+    ]
+    return "\n".join(lines)
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(lines: List[str]) -> bytes:
+    """Minimal text PDF with LINES_PER_PAGE lines per page in Helvetica"""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in pages:
+        text = "".join(f"({_pdf_escape(line)}) Tj T*\n" for line in page)
+        stream = f"BT /F1 10 Tf 15 TL 50 780 Td\n{text}ET".encode("latin-1", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_document(pages: int, fmt: str, seed: int = 0) -> Tuple[str, bytes]:
+    """(filename, bytes) of a synthetic resume in txt or pdf format"""
+    lines = make_resume(pages, seed)
+    if fmt == "pdf":
+        return f"resume_{pages}p_{seed}.pdf", make_pdf(lines)
+    return f"resume_{pages}p_{seed}.txt", "\n".join(lines).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic resume corpus")
+    parser.add_argument("--out", required=True, help="Directory to write resumes and jd.txt into")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    parser.add_argument("--formats", nargs="+", default=["txt", "pdf"], choices=["txt", "pdf"])
+    parser.add_argument("--per-size", type=int, default=1, help="Resumes per size and format")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for pages in args.pages:
+        for fmt in args.formats:
+            for seed in range(args.per_size):
+                name, data = make_document(pages, fmt, seed)
+                with open(os.path.join(args.out, name), "wb") as f:
+                    f.write(data)
+    with open(os.path.join(args.out, "jd.txt"), "w", encoding="utf-8") as f:
+        f.write(make_jd())
+
+
+if __name__ == "__main__":
+    main()
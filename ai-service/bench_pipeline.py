@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+# Measure the work itself: no cached texts or embeddings, no resume store writes, no LLM
+os.environ.setdefault("CACHE_ENABLED", "false")
+os.environ.setdefault("STORE_RESUMES", "false")
+os.environ.setdefault("ENABLE_LLM", "false")
+
+import numpy as np
+
+from analyze import compute_scores, extract_features, extract_resume_text, score_batch, tokenize
+from bench_corpus import make_document, make_jd
+from chunking import encode_documents
+from config import embedding_config, extraction_config
+from extraction import pdf_extractor
+from model_registry import model_registry
+from skill_taxonomy import skill_taxonomy
+
+STAGES = ("extraction", "tokenize", "skills", "features", "features_legacy", "embedding", "heuristics", "end_to_end")
+
+# Differences below this many milliseconds are treated as timer noise
+NOISE_FLOOR_MS = 0.05
+
+EDUCATION_TERMS = ["bachelor", "master", "b.tech", "b.e", "bsc", "msc", "phd", "degree"]
+
+
+def legacy_features(text: str, is_jd: bool = False) -> Dict:
+    """The previous multi-pass extraction: one lowercase copy and scan per feature"""
+    tokens = re.findall(r"[a-zA-Z][a-zA-Z+\-#]*", text.lower())
+    years = 0
+    for m in re.finditer(r"(\d+)[+ ]*years?", text.lower()):
+        years = max(years, int(m.group(1)))
+    features = {
+        "tokens": tokens,
+        "token_set": set(tokens),
+        "skills": skill_taxonomy.match(text)["skills"],
+        "years": years,
+        "edu_hits": sum(1 for kw in EDUCATION_TERMS if kw in text.lower()),
+    }
+    if is_jd:
+        freq: Dict[str, int] = {}
+        for t in tokens:
+            if len(t) > 4:
+                freq[t] = freq.get(t, 0) + 1
+        features["top_keywords"] = [k for k, _ in sorted(freq.items(), key=lambda x: -x[1])][:15]
+    return features
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict:
+    """Median and best wall time of fn over repeat runs, plus the peak traced allocation of one run"""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_suite(pages_list: List[int], formats: List[str], repeat: int, stages: List[str]) -> Dict:
+    """Time every selected stage for each document size; keys are stage/format/pages"""
+    jd_text = make_jd()
+    jd_features = extract_features(jd_text, is_jd=True)
+    model_registry.warmup()
+
+    results: Dict[str, Dict] = {}
+    for pages in pages_list:
+        text = None
+        for fmt in formats:
+            name, data = make_document(pages, fmt)
+            if "extraction" in stages:
+                results[f"extraction/{fmt}/{pages}p"] = measure(lambda: extract_resume_text(data, name), repeat)
+            if text is None:
+                text = extract_resume_text(data, name)
+
+        tokens = tokenize(text)
+        features = extract_features(text)
+        stage_fns = {
+            "tokenize": lambda: tokenize(text),
+            "skills": lambda: skill_taxonomy.match_tokens(tokens),
+            "features": lambda: extract_features(text),
+            "features_legacy": lambda: legacy_features(text),
+            "embedding": lambda: encode_documents([text, jd_text]),
+            "heuristics": lambda: score_batch([features], jd_features, np.array([0.5])),
+            "end_to_end": lambda: compute_scores(text, jd_text, use_llm=False),
+        }
+        for stage, fn in stage_fns.items():
+            if stage in stages:
+                results[f"{stage}/text/{pages}p"] = measure(fn, repeat)
+        print(f"Benchmarked {pages}-page documents", file=sys.stderr, flush=True)
+    return results
+
+
+def feature_speedups(results: Dict) -> Dict[str, float]:
+    """How many times faster single-pass feature extraction is than the legacy one, per size"""
+    speedups = {}
+    for key, current in results.items():
+        stage, fmt, size = key.split("/")
+        legacy = results.get(f"features_legacy/{fmt}/{size}")
+        if stage == "features" and legacy is not None:
+            speedups[f"{fmt}/{size}"] = round(legacy["min_ms"] / max(current["min_ms"], 1e-6), 2)
+    return speedups
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """Benchmarks whose best time or peak memory grew more than tolerance over the baseline"""
+    regressions = []
+    for key, result in current["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        # Best-of-N time is far less noisy than the median on a busy machine
+        for metric, floor in (("min_ms", NOISE_FLOOR_MS), ("peak_kb", 1.0)):
+            if result[metric] > before[metric] * (1 + tolerance) and result[metric] - before[metric] > floor:
+                regressions.append({
+                    "benchmark": key,
+                    "metric": metric,
+                    "baseline": before[metric],
+                    "current": result[metric],
+                    "change": round(result[metric] / max(before[metric], 1e-9) - 1, 3),
+                })
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the scoring pipeline stage by stage")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20], help="Resume sizes in pages")
+    parser.add_argument("--formats", nargs="+", default=["txt", "pdf"], choices=["txt", "pdf"])
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--output", help="Write results JSON here (printed to stdout otherwise)")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown or memory growth, as a fraction")
+    args = parser.parse_args()
+
+    try:
+        results = run_suite(args.pages, args.formats, max(1, args.repeat), args.stages)
+    finally:
+        pdf_extractor.close()
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "model": embedding_config.model_identity(),
+            "pdf_workers": extraction_config.processes,
+            "repeat": args.repeat,
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        "results": results,
+    }
+    speedups = feature_speedups(results)
+    if speedups:
+        report["feature_speedups"] = speedups
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(json.dumps({"regression": regression}), file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
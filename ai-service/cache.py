@@ -0,0 +1,330 @@
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+from config import cache_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def text_key(data: bytes, filename: str = "") -> str:
+    """Cache key of an uploaded file: SHA-256 of its bytes plus its extension"""
+    extension = os.path.splitext(filename)[1].lower()
+    return f"{hashlib.sha256(data).hexdigest()}{extension}"
+
+
+def stream_text_key(stream: BinaryIO, filename: str = "") -> str:
+    """text_key of a seekable binary stream, hashed in chunks and rewound to where it started"""
+    start = stream.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+        digest.update(chunk)
+    stream.seek(start)
+    extension = os.path.splitext(filename)[1].lower()
+    return f"{digest.hexdigest()}{extension}"
+
+
+def embedding_key(model_name: str, text: str) -> str:
+    """Cache key of an embedding: SHA-256 of the model name and whitespace-normalized text"""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(f"{model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+def llm_key(prompt_version: str, model: str, temperature: float, resume_text: str, jd_text: str) -> str:
+    """Cache key of an LLM analysis: SHA-256 of everything that determines the model output"""
+    parts = [prompt_version, model, repr(float(temperature)), resume_text, jd_text]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def _sizeof(value: Any) -> int:
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    # Containers: getsizeof ignores their contents, so measure the serialized form
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache bounded by the approximate size of its values"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any) -> None:
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes[key]
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, _ = self._data.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        return {"entries": len(self._data), "bytes": self._bytes, "max_bytes": self.max_bytes, "evictions": self.evictions}
+
+
+class DiskCache:
+    """SQLite-backed cache shared between processes, evicting least recently used entries by size"""
+
+    def __init__(self, path: str, namespace: str, max_bytes: int):
+        self.path = path
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect()
+        # A preforking server creates this in its master; SQLite connections
+        # must not cross a fork, so every forked worker opens its own
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (namespace, accessed)")
+            # Running size of each namespace, kept in step with every write so set() never sums the table
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_totals (namespace TEXT PRIMARY KEY, bytes INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO cache_totals (namespace, bytes) "
+                "SELECT ?, COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?",
+                (self.namespace, self.namespace),
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE cache SET accessed = ? WHERE namespace = ? AND key = ?", (time.time(), self.namespace, key)
+            )
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._conn:
+            # BEGIN IMMEDIATE takes the write lock first, so the total cannot change between reading and updating it
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT size FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, blob, len(blob), time.time()),
+            )
+            total = self._add_bytes(len(blob) - (row[0] if row else 0))
+            if total > self.max_bytes:
+                self._evict(total)
+
+    def _add_bytes(self, delta: int) -> int:
+        """Adjust the namespace's running size and return the new total"""
+        self._conn.execute("UPDATE cache_totals SET bytes = bytes + ? WHERE namespace = ?", (delta, self.namespace))
+        return self._conn.execute("SELECT bytes FROM cache_totals WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+
+    def _evict(self, total: int) -> None:
+        """Delete least recently used rows until the namespace fits in max_bytes again"""
+        rows = self._conn.execute(
+            "SELECT key, size FROM cache WHERE namespace = ? ORDER BY accessed", (self.namespace,)
+        )
+        doomed = []
+        freed = 0
+        for key, size in rows:
+            if total - freed <= self.max_bytes:
+                break
+            doomed.append((self.namespace, key))
+            freed += size
+        self._conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", doomed)
+        self._add_bytes(-freed)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+
+class TwoTierCache:
+    """In-process LRU in front of an optional on-disk cache, with hit and miss counters
+
+    With a ttl, entries are stored as (expires_at, value) and expired entries
+    are treated as misses; they are overwritten on the next set or evicted.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        memory_bytes: int,
+        disk: Optional[DiskCache] = None,
+        enabled: bool = True,
+        ttl: Optional[float] = None,
+    ):
+        self.name = name
+        self.enabled = enabled
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.memory = LRUCache(memory_bytes)
+        self.disk = disk
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def _fresh(self, entry: Any) -> bool:
+        return self.ttl is None or entry[0] > time.time()
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        entry = self.memory.get(key)
+        counter = "memory_hits"
+        if entry is None and self.disk is not None:
+            try:
+                entry = self.disk.get(key)
+            except Exception as e:
+                logger.warning(f"{self.name} disk cache read failed: {e}")
+                entry = None
+            counter = "disk_hits"
+            if entry is not None and self._fresh(entry):
+                self.memory.set(key, entry)
+        if entry is not None and not self._fresh(entry):
+            self._count("expired")
+            entry = None
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count(counter)
+        return entry[1] if self.ttl is not None else entry
+
+    def set(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        entry = (time.time() + self.ttl, value) if self.ttl is not None else value
+        self.memory.set(key, entry)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, entry)
+            except Exception as e:
+                logger.warning(f"{self.name} disk cache write failed: {e}")
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        stats = {
+            "enabled": self.enabled,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory": self.memory.stats(),
+        }
+        if self.ttl is not None:
+            stats["ttl"] = self.ttl
+            stats["expired"] = self.expired
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key onto one execution of the function"""
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """Run fn, or wait up to timeout seconds for the identical call already in flight"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executions += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result(timeout)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"in_flight": len(self._calls), "executions": self.executions, "shared": self.shared}
+
+
+def _make_cache(name: str, memory_mb: float, ttl: Optional[float] = None) -> TwoTierCache:
+    disk = None
+    if cache_config.enabled and cache_config.disk:
+        try:
+            disk = DiskCache(cache_config.disk_path, name, int(cache_config.disk_max_mb * 1024 * 1024))
+        except Exception as e:
+            logger.warning(f"Disk cache unavailable, using memory only: {e}")
+    return TwoTierCache(name, int(memory_mb * 1024 * 1024), disk, enabled=cache_config.enabled, ttl=ttl)
+
+
+# Global cache instances
+text_cache = _make_cache("text", cache_config.text_memory_mb)
+embedding_cache = _make_cache("embedding", cache_config.embedding_memory_mb)
+llm_cache = _make_cache("llm", cache_config.llm_memory_mb, ttl=cache_config.llm_ttl)
@@ -0,0 +1,85 @@
+import logging
+from typing import List
+
+import numpy as np
+
+from batching import encode_texts
+from config import embedding_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHUNK_AGGREGATES = ("max", "mean")
+
+
+def split_windows(text: str, size: int, overlap: int, max_chunks: int = 0) -> List[str]:
+    """Split a document into overlapping windows of size words; short documents stay whole"""
+    words = text.split()
+    if len(words) <= size:
+        return [text]
+    stride = max(1, size - overlap)
+    windows = [" ".join(words[start:start + size]) for start in range(0, len(words) - overlap, stride)]
+    if 0 < max_chunks < len(windows):
+        logger.info(f"Document split into {len(windows)} chunks, encoding the first {max_chunks}")
+        windows = windows[:max_chunks]
+    return windows
+
+
+def encode_documents(texts: List[str]) -> List[np.ndarray]:
+    """Embedding matrix of each document, one row per chunk
+
+    With chunking off every document is a single row. Chunks of all documents
+    go through one batched, cached encode call, so a resume scored before
+    only costs the encoding of the new JD.
+    """
+    if not embedding_config.chunking:
+        return [row[None, :] for row in encode_texts(texts)]
+
+    chunks = [
+        split_windows(text, embedding_config.chunk_words, embedding_config.chunk_overlap, embedding_config.max_chunks)
+        for text in texts
+    ]
+    embeddings = encode_texts([chunk for document in chunks for chunk in document])
+    offsets = np.cumsum([0] + [len(document) for document in chunks])
+    return [embeddings[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
+
+
+def document_similarity(resume_chunks: np.ndarray, jd_chunks: np.ndarray) -> float:
+    """Cosine similarity of two chunked documents
+
+    "max" scores each JD chunk by its best matching resume chunk and averages
+    over the JD; "mean" averages every chunk pair. Both reduce to the plain
+    cosine similarity for single-chunk documents.
+    """
+    similarities = jd_chunks @ resume_chunks.T
+    if embedding_config.chunk_aggregate == "mean":
+        return float(similarities.mean())
+    return float(similarities.max(axis=1).mean())
+
+
+def batch_similarity(documents: List[np.ndarray], jd_chunks: np.ndarray) -> np.ndarray:
+    """document_similarity of many chunked documents against one JD
+
+    Single-chunk documents, which is all of them with chunking off, are scored
+    with one matrix product; only multi-chunk documents take the per-document path.
+    """
+    similarities = np.empty(len(documents))
+    single = [i for i, chunks in enumerate(documents) if len(chunks) == 1]
+    if single:
+        # With one resume chunk both aggregates reduce to the mean over JD chunks
+        matrix = np.vstack([documents[i] for i in single])
+        similarities[single] = (matrix @ jd_chunks.T).mean(axis=1)
+    for i, chunks in enumerate(documents):
+        if len(chunks) != 1:
+            similarities[i] = document_similarity(chunks, jd_chunks)
+    return similarities
+
+
+def document_embedding(chunks: np.ndarray) -> np.ndarray:
+    """Single L2-normalized embedding of a chunked document, for storage and search"""
+    if len(chunks) == 1:
+        return chunks[0]
+    embedding = chunks.mean(axis=0)
+    norm = np.linalg.norm(embedding)
+    return (embedding / norm if norm > 0 else embedding).astype(np.float32)
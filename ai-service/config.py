@@ -11,6 +11,20 @@ class LLMConfig:
         self.timeout = int(os.getenv("LLM_TIMEOUT", "30"))
         self.temperature = float(os.getenv("LLM_TEMPERATURE", "0.3"))
         self.max_tokens = int(os.getenv("LLM_MAX_TOKENS", "1000"))
+        # Per-request latency budget for the LLM before falling back to traditional scores
+        self.deadline = float(os.getenv("LLM_DEADLINE", "20"))
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        # Constrain output to the analysis JSON: schema, json (any object) or none
+        self.structured_output = os.getenv("LLM_STRUCTURED_OUTPUT", "schema").lower()
+        # Prompt token budgets; longer texts are cut down to their most relevant sections (0 disables)
+        self.prompt_resume_tokens = int(os.getenv("LLM_PROMPT_RESUME_TOKENS", "1200"))
+        self.prompt_jd_tokens = int(os.getenv("LLM_PROMPT_JD_TOKENS", "600"))
+        # Keep-alive connections to the LLM server and background health checking
+        self.pool_size = int(os.getenv("LLM_POOL_SIZE", str(self.max_concurrency)))
+        self.connect_timeout = float(os.getenv("LLM_CONNECT_TIMEOUT", "2"))
+        self.health_interval = float(os.getenv("LLM_HEALTH_INTERVAL", "15"))
+        self.failure_threshold = int(os.getenv("LLM_FAILURE_THRESHOLD", "3"))
+        self.circuit_cooldown = float(os.getenv("LLM_CIRCUIT_COOLDOWN", "30"))
         
     def _get_default_url(self) -> str:
         """Get default URL based on server type"""
@@ -43,9 +57,289 @@ class LLMConfig:
             "timeout": self.timeout,
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
+            "deadline": self.deadline,
+            "max_concurrency": self.max_concurrency,
+            "structured_output": self.structured_output,
+            "prompt_resume_tokens": self.prompt_resume_tokens,
+            "prompt_jd_tokens": self.prompt_jd_tokens,
+            "pool_size": self.pool_size,
+            "connect_timeout": self.connect_timeout,
+            "health_interval": self.health_interval,
+            "failure_threshold": self.failure_threshold,
+            "circuit_cooldown": self.circuit_cooldown,
             "enabled": self.is_enabled()
         }
 
 
 # Global configuration instance
 llm_config = LLMConfig()
+
+
+class EmbeddingConfig:
+    """Configuration for sentence embedding models"""
+    
+    def __init__(self):
+        self.model_name = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+        # Inference backend: torch (fp32), onnx, or onnx-int8 (dynamically quantized, CPU)
+        self.backend = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+        self.quantization_config = os.getenv("EMBEDDING_QUANTIZATION", "avx2")
+        # Exported ONNX models are kept here; empty means DATA_DIR/models
+        self.artifact_dir = os.getenv("EMBEDDING_ARTIFACT_DIR", "")
+        # Empty device means "cuda if available, else cpu"
+        self.device = os.getenv("EMBEDDING_DEVICE", "")
+        self.warmup = os.getenv("EMBEDDING_WARMUP", "true").lower() == "true"
+        # Micro-batching of encode calls from concurrent requests
+        self.batching = os.getenv("EMBEDDING_BATCHING", "true").lower() == "true"
+        self.batch_max_size = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+        self.batch_max_wait_ms = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+        # Long documents are split into overlapping word windows so text past the model's input limit still counts
+        self.chunking = os.getenv("EMBEDDING_CHUNKING", "false").lower() == "true"
+        self.chunk_words = int(os.getenv("EMBEDDING_CHUNK_WORDS", "160"))
+        self.chunk_overlap = int(os.getenv("EMBEDDING_CHUNK_OVERLAP", "32"))
+        self.max_chunks = int(os.getenv("EMBEDDING_MAX_CHUNKS", "32"))
+        # How chunk-to-chunk similarities become semanticMatch: max (best resume chunk per JD chunk) or mean
+        self.chunk_aggregate = os.getenv("EMBEDDING_CHUNK_AGGREGATE", "max").lower()
+    
+    def model_identity(self) -> str:
+        """Model name plus non-default backend; embeddings from different backends differ slightly"""
+        return self.model_name if self.backend == "torch" else f"{self.model_name}@{self.backend}"
+    
+    def get_config_dict(self) -> dict:
+        """Get configuration as dictionary"""
+        return {
+            "model_name": self.model_name,
+            "backend": self.backend,
+            "quantization_config": self.quantization_config,
+            "artifact_dir": self.artifact_dir or "DATA_DIR/models",
+            "device": self.device or "auto",
+            "warmup": self.warmup,
+            "batching": self.batching,
+            "batch_max_size": self.batch_max_size,
+            "batch_max_wait_ms": self.batch_max_wait_ms,
+            "chunking": self.chunking,
+            "chunk_words": self.chunk_words,
+            "chunk_overlap": self.chunk_overlap,
+            "max_chunks": self.max_chunks,
+            "chunk_aggregate": self.chunk_aggregate
+        }
+
+
+# Global embedding configuration instance
+embedding_config = EmbeddingConfig()
+
+
+class StorageConfig:
+    """Configuration for on-disk stores"""
+    
+    def __init__(self):
+        default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+        self.data_dir = os.getenv("DATA_DIR", default_dir)
+        self.catalog_dir = os.getenv("CATALOG_DIR", os.path.join(self.data_dir, "catalog"))
+        self.persist_catalog = os.getenv("PERSIST_CATALOG", "true").lower() == "true"
+        self.resume_store_dir = os.getenv("RESUME_STORE_DIR", os.path.join(self.data_dir, "resumes"))
+        self.store_resumes = os.getenv("STORE_RESUMES", "true").lower() == "true"
+        self.profiles_dir = os.getenv("JOB_PROFILES_DIR", os.path.join(self.data_dir, "job_profiles"))
+    
+    def get_config_dict(self) -> dict:
+        """Get configuration as dictionary"""
+        return {
+            "data_dir": self.data_dir,
+            "catalog_dir": self.catalog_dir,
+            "persist_catalog": self.persist_catalog,
+            "resume_store_dir": self.resume_store_dir,
+            "store_resumes": self.store_resumes,
+            "profiles_dir": self.profiles_dir
+        }
+
+
+# Global storage configuration instance
+storage_config = StorageConfig()
+
+
+class ExtractionConfig:
+    """Configuration for resume text extraction"""
+    
+    def __init__(self):
+        # PDF parsing runs in worker processes; 0 parses in the calling thread without a timeout
+        self.processes = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.timeout = float(os.getenv("PDF_TIMEOUT", "20"))
+        self.max_pages = int(os.getenv("PDF_MAX_PAGES", "30"))
+        self.pages_per_task = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+        # Files extracted concurrently by batch ranking and bulk jobs
+        self.parallel_files = int(os.getenv("EXTRACT_PARALLEL_FILES", str(max(1, self.processes))))
+        # Uploads that are not seekable are buffered in memory up to this size, then on disk
+        self.spool_max_mb = float(os.getenv("UPLOAD_SPOOL_MAX_MB", "4"))
+    
+    def get_config_dict(self) -> dict:
+        """Get configuration as dictionary"""
+        return {
+            "processes": self.processes,
+            "timeout": self.timeout,
+            "max_pages": self.max_pages,
+            "pages_per_task": self.pages_per_task,
+            "parallel_files": self.parallel_files,
+            "spool_max_mb": self.spool_max_mb
+        }
+
+
+# Global extraction configuration instance
+extraction_config = ExtractionConfig()
+
+
+class CacheConfig:
+    """Configuration for the extracted-text, embedding and LLM analysis caches"""
+    
+    def __init__(self):
+        self.enabled = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+        self.text_memory_mb = float(os.getenv("CACHE_TEXT_MEMORY_MB", "64"))
+        self.embedding_memory_mb = float(os.getenv("CACHE_EMBEDDING_MEMORY_MB", "64"))
+        # Parsed LLM analyses expire so prompt or model tweaks on the server are picked up eventually
+        self.llm_memory_mb = float(os.getenv("CACHE_LLM_MEMORY_MB", "16"))
+        self.llm_ttl = float(os.getenv("CACHE_LLM_TTL", "86400"))
+        # Optional on-disk SQLite tier shared by every worker process
+        self.disk = os.getenv("CACHE_DISK", "true").lower() == "true"
+        self.disk_path = os.getenv("CACHE_DISK_PATH", os.path.join(storage_config.data_dir, "cache.sqlite"))
+        # Per cache: text, embeddings and LLM analyses each get this much disk
+        self.disk_max_mb = float(os.getenv("CACHE_DISK_MAX_MB", "512"))
+    
+    def get_config_dict(self) -> dict:
+        """Get configuration as dictionary"""
+        return {
+            "enabled": self.enabled,
+            "text_memory_mb": self.text_memory_mb,
+            "embedding_memory_mb": self.embedding_memory_mb,
+            "llm_memory_mb": self.llm_memory_mb,
+            "llm_ttl": self.llm_ttl,
+            "disk": self.disk,
+            "disk_path": self.disk_path,
+            "disk_max_mb": self.disk_max_mb
+        }
+
+
+# Global cache configuration instance
+cache_config = CacheConfig()
+
+
+class JobConfig:
+    """Configuration for the asynchronous analysis job queue and its workers"""
+    
+    def __init__(self):
+        self.db_path = os.getenv("JOB_QUEUE_PATH", os.path.join(storage_config.data_dir, "jobs.sqlite"))
+        self.upload_dir = os.getenv("JOB_UPLOAD_DIR", os.path.join(storage_config.data_dir, "job_uploads"))
+        # Worker processes started with the service; 0 leaves jobs to `python job_worker.py`
+        self.workers = int(os.getenv("JOB_WORKERS", "1"))
+        self.batch_size = int(os.getenv("JOB_BATCH_SIZE", "4"))
+        self.visibility_timeout = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))
+        self.max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        self.poll_interval = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+    
+    def get_config_dict(self) -> dict:
+        """Get configuration as dictionary"""
+        return {
+            "db_path": self.db_path,
+            "upload_dir": self.upload_dir,
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "visibility_timeout": self.visibility_timeout,
+            "max_attempts": self.max_attempts,
+            "poll_interval": self.poll_interval
+        }
+
+
+# Global job configuration instance
+job_config = JobConfig()
+
+
+class SkillConfig:
+    """Configuration for the skill and education taxonomy"""
+    
+    def __init__(self):
+        default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills.json")
+        self.taxonomy_path = os.getenv("SKILLS_TAXONOMY_PATH", default_path)
+        # Compiled tries are kept here, keyed by the taxonomy's content hash
+        self.compiled_dir = os.getenv("SKILLS_COMPILED_DIR", os.path.join(storage_config.data_dir, "skills"))
+    
+    def get_config_dict(self) -> dict:
+        """Get configuration as dictionary"""
+        return {
+            "taxonomy_path": self.taxonomy_path,
+            "compiled_dir": self.compiled_dir
+        }
+
+
+# Global skill configuration instance
+skill_config = SkillConfig()
+
+
+class DaemonConfig:
+    """Configuration for the optional warm analysis daemon used by the CLI"""
+    
+    def __init__(self):
+        self.socket_path = os.getenv("ANALYZE_DAEMON_SOCKET", os.path.join(storage_config.data_dir, "analyze.sock"))
+        # Seconds the CLI waits for the daemon's answer; long enough for an LLM analysis
+        self.timeout = float(os.getenv("ANALYZE_DAEMON_TIMEOUT", "120"))
+    
+    def get_config_dict(self) -> dict:
+        """Get configuration as dictionary"""
+        return {
+            "socket_path": self.socket_path,
+            "timeout": self.timeout
+        }
+
+
+# Global daemon configuration instance
+daemon_config = DaemonConfig()
+
+
+class TelemetryConfig:
+    """Configuration for request tracing, the /metrics endpoint and the slow-request profiler"""
+    
+    def __init__(self):
+        self.metrics = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        # Add per-stage timings to every analysis response, not only those asked for with ?timings=true
+        self.response_timings = os.getenv("RESPONSE_TIMINGS", "false").lower() == "true"
+        # Requests slower than this many milliseconds have their sampled stacks saved (0 disables)
+        self.profile_threshold_ms = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+        self.profile_interval_ms = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+        self.profile_dir = os.getenv("PROFILE_DIR", os.path.join(storage_config.data_dir, "profiles"))
+        self.profile_max_files = int(os.getenv("PROFILE_MAX_FILES", "100"))
+    
+    def get_config_dict(self) -> dict:
+        """Get configuration as dictionary"""
+        return {
+            "metrics": self.metrics,
+            "response_timings": self.response_timings,
+            "profile_threshold_ms": self.profile_threshold_ms,
+            "profile_interval_ms": self.profile_interval_ms,
+            "profile_dir": self.profile_dir,
+            "profile_max_files": self.profile_max_files
+        }
+
+
+# Global telemetry configuration instance
+telemetry_config = TelemetryConfig()
+
+
+class ServingConfig:
+    """Configuration for the async ASGI server and preforked multi-process deployments"""
+    
+    def __init__(self):
+        # Threads running scoring and extraction off the event loop; they mostly wait on the
+        # batched encoder, so by default there are enough of them to fill one encode batch
+        self.cpu_workers = int(os.getenv("ASYNC_CPU_WORKERS", str(embedding_config.batch_max_size)))
+        # CPU jobs allowed to wait for a thread before requests are answered with 503
+        self.cpu_queue = int(os.getenv("ASYNC_CPU_QUEUE", "256"))
+        # Load the embedding model at import so a preforking server shares it with its workers
+        self.preload_model = os.getenv("PRELOAD_MODEL", "false").lower() == "true"
+    
+    def get_config_dict(self) -> dict:
+        """Get configuration as dictionary"""
+        return {
+            "cpu_workers": self.cpu_workers,
+            "cpu_queue": self.cpu_queue,
+            "preload_model": self.preload_model
+        }
+
+
+# Global serving configuration instance
+serving_config = ServingConfig()
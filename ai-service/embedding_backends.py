@@ -0,0 +1,127 @@
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import embedding_config, storage_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# ONNX files inside an artifact directory, where sentence-transformers looks for them
+ONNX_FILES = {"onnx": "onnx/model.onnx", "onnx-int8": "onnx/model_qint8.onnx"}
+
+# Used by the drift check when no corpus is given
+SAMPLE_CORPUS = [
+    "Senior Python developer with 7 years of experience building REST APIs with Flask and Django.",
+    "Machine learning engineer experienced in PyTorch, scikit-learn and deploying NLP models.",
+    "Frontend engineer skilled in React, TypeScript and Next.js with a focus on accessibility.",
+    "DevOps engineer managing Kubernetes clusters on AWS with Terraform and GitHub Actions.",
+    "Data analyst proficient in SQL, pandas and Tableau, reporting to product leadership.",
+    "We are hiring a backend engineer to design scalable microservices and event pipelines.",
+    "Bachelor's degree in Computer Science or equivalent practical experience required.",
+    "Registered nurse with ICU experience, BLS and ACLS certifications, and strong patient care.",
+]
+
+
+def artifact_path(model_name: str, backend: str) -> str:
+    """Directory holding the exported or quantized artifacts of a model for one backend"""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name).strip("_")
+    root = embedding_config.artifact_dir or os.path.join(storage_config.data_dir, "models")
+    return os.path.join(root, f"{slug}-{backend}")
+
+
+def _export(model_name: str, backend: str, device: str, path: str) -> None:
+    """Export a model to ONNX (and quantize it to int8) into path, once"""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    logger.info(f"Exporting embedding model {model_name} for the {backend} backend to {path}")
+    start = time.perf_counter()
+    model = SentenceTransformer(model_name, device=device, backend="onnx")
+    model.save_pretrained(path)
+    if backend == "onnx-int8":
+        export_dynamic_quantized_onnx_model(
+            model, embedding_config.quantization_config, path, file_suffix="qint8"
+        )
+    logger.info(f"Exported {model_name} for {backend} in {time.perf_counter() - start:.1f}s")
+
+
+def load_embedding_model(model_name: str, backend: str, device: str):
+    """Load a SentenceTransformer on the given backend, exporting ONNX artifacts on first use"""
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {', '.join(EMBEDDING_BACKENDS)}")
+    if backend == "torch":
+        return SentenceTransformer(model_name, device=device)
+
+    path = artifact_path(model_name, backend)
+    if not os.path.exists(os.path.join(path, ONNX_FILES[backend])):
+        _export(model_name, backend, device, path)
+    return SentenceTransformer(path, device=device, backend="onnx", model_kwargs={"file_name": ONNX_FILES[backend]})
+
+
+def _encode(model, texts: List[str]) -> np.ndarray:
+    return model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+
+
+def compare_backends(texts: List[str], backends: List[str], model_name: Optional[str] = None, device: str = "cpu") -> Dict:
+    """Cosine drift of each backend against torch fp32 on texts, with encode throughput"""
+    model_name = model_name or embedding_config.model_name
+    report: Dict = {"model": model_name, "texts": len(texts), "backends": {}}
+    reference = None
+    for backend in ["torch", *[b for b in backends if b != "torch"]]:
+        model = load_embedding_model(model_name, backend, device)
+        _encode(model, texts[:2])  # warm up before timing
+        start = time.perf_counter()
+        embeddings = _encode(model, texts)
+        seconds = time.perf_counter() - start
+        result = {"texts_per_second": round(len(texts) / seconds, 1)}
+        if reference is None:
+            reference = embeddings
+        else:
+            cosines = np.sum(reference * embeddings, axis=1)
+            result.update({
+                "mean_cosine": round(float(cosines.mean()), 5),
+                "min_cosine": round(float(cosines.min()), 5),
+                "max_drift": round(float(1.0 - cosines.min()), 5),
+            })
+        report["backends"][backend] = result
+    return report
+
+
+def _load_corpus(path: Optional[str]) -> List[str]:
+    """Non-empty lines of a text file, the .txt files of a directory, or the built-in sample"""
+    if not path:
+        return SAMPLE_CORPUS
+    if os.path.isdir(path):
+        texts = []
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith(".txt"):
+                with open(os.path.join(path, name), encoding="utf-8", errors="ignore") as f:
+                    texts.append(f.read())
+        return texts
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare embedding backends against torch fp32")
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8"], choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--corpus", help="Text file (one document per line) or directory of .txt files")
+    parser.add_argument("--model", default=embedding_config.model_name)
+    args = parser.parse_args()
+
+    print(json.dumps(compare_backends(_load_corpus(args.corpus), args.backends, args.model), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TypeVar, Union
+
+from config import extraction_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# How often a waiting caller checks whether the pool was recycled under it
+_POLL_SECONDS = 0.25
+
+
+class ExtractionError(Exception):
+    """A resume file could not be turned into text"""
+
+
+class _PoolRecycled(Exception):
+    """The pool was terminated because another document timed out; the work can be retried"""
+
+
+class _SharedPdf(NamedTuple):
+    """A PDF held in a shared memory block; only the block name crosses to the workers"""
+    name: str
+    size: int
+
+
+PdfSource = Union[bytes, BinaryIO, str, _SharedPdf]
+
+
+def _pdf_reader(source: PdfSource):
+    """A PDF reader over bytes, a binary file object, a file path or a shared memory block"""
+    from PyPDF2 import PdfReader  # type: ignore
+
+    if isinstance(source, _SharedPdf):
+        block = shared_memory.SharedMemory(name=source.name)
+        try:
+            source = bytes(block.buf[:source.size])
+        finally:
+            block.close()
+    return PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def _pdf_page_count(source: PdfSource) -> int:
+    return len(_pdf_reader(source).pages)
+
+
+def _pdf_page_text(source: PdfSource, start: int, stop: int) -> str:
+    """Text of pages [start, stop) of a PDF"""
+    reader = _pdf_reader(source)
+    return "\n".join(reader.pages[i].extract_text() or "" for i in range(start, stop))
+
+
+def _source_size(source: Union[bytes, BinaryIO]) -> Optional[int]:
+    """Size of an upload in bytes, or None for a stream that cannot seek"""
+    if isinstance(source, bytes):
+        return len(source)
+    try:
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END) - position
+        source.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _share(source: Union[bytes, BinaryIO], size: int) -> shared_memory.SharedMemory:
+    """Copy a PDF into a new shared memory block; the caller closes and unlinks it"""
+    block = shared_memory.SharedMemory(create=True, size=max(1, size))
+    try:
+        if isinstance(source, bytes):
+            block.buf[:size] = source
+        else:
+            view, filled = block.buf, 0
+            while filled < size:
+                read = source.readinto(view[filled:size])
+                if not read:
+                    break
+                filled += read
+            del view
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    return block
+
+
+def _spill_to_file(source: Union[bytes, BinaryIO]) -> str:
+    """Copy a PDF to a temporary file in chunks and return its path; the caller deletes it"""
+    with tempfile.NamedTemporaryFile(prefix="resume-", suffix=".pdf", delete=False) as spill:
+        try:
+            if isinstance(source, bytes):
+                spill.write(source)
+            else:
+                shutil.copyfileobj(source, spill)
+        except BaseException:
+            os.unlink(spill.name)
+            raise
+    return spill.name
+
+
+class PdfExtractor:
+    """Extracts PDF text in a pool of worker processes with a wall-clock timeout per document
+
+    Pages beyond max_pages are ignored, and long documents are split into
+    page ranges extracted by several workers at once. Workers cannot be
+    interrupted, so a timeout terminates the whole pool and a fresh one is
+    started; other documents caught in the recycle are retried once.
+    """
+
+    def __init__(self, processes: int = 2, timeout: float = 20.0, max_pages: int = 30, pages_per_task: int = 8):
+        self.processes = processes
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.pages_per_task = max(1, pages_per_task)
+        self._pool = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"documents": 0, "pages": 0, "truncated": 0, "timeouts": 0, "failures": 0, "pool_restarts": 0}
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += value
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Spawn gives workers a fresh interpreter instead of forking the server's threads
+                context = multiprocessing.get_context("spawn")
+                self._pool = context.Pool(self.processes, maxtasksperchild=100)
+            return self._pool, self._generation
+
+    def _recycle(self, generation: int) -> None:
+        """Terminate a pool that holds a runaway task, unless it was already replaced"""
+        with self._lock:
+            if self._generation != generation or self._pool is None:
+                return
+            pool, self._pool = self._pool, None
+            self._generation += 1
+            self._stats["pool_restarts"] += 1
+        pool.terminate()
+
+    def _map(self, fn: Callable, arg_list: List[Tuple], deadline: float) -> List:
+        """Run fn over arg_list in the pool, waiting until the deadline for every result"""
+        if self.processes <= 0:
+            return [fn(*args) for args in arg_list]
+
+        for attempt in range(2):
+            pool, generation = self._get_pool()
+            pending = [pool.apply_async(fn, args) for args in arg_list]
+            try:
+                return [self._wait(result, generation, deadline) for result in pending]
+            except _PoolRecycled:
+                logger.info("Extraction pool was restarted, retrying document")
+            except multiprocessing.TimeoutError:
+                self._recycle(generation)
+                raise
+        raise multiprocessing.TimeoutError()
+
+    def _wait(self, result, generation: int, deadline: float):
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise multiprocessing.TimeoutError()
+            try:
+                return result.get(timeout=min(remaining, _POLL_SECONDS))
+            except multiprocessing.TimeoutError:
+                if self._generation != generation:
+                    raise _PoolRecycled()
+
+    def extract(self, source: Union[bytes, BinaryIO], name: str = "") -> str:
+        """Extract the text of a PDF from bytes or a binary file object
+
+        Raises ExtractionError on parse failures and timeouts. File objects
+        are read straight from the stream when parsing in-process. For the
+        pool, uploads up to UPLOAD_SPOOL_MAX_MB are copied once into shared
+        memory and the workers get only the block name, so task payloads do
+        not grow with the upload size times the number of page ranges;
+        larger or unsized uploads are spilled to a temporary file instead.
+        """
+        deadline = time.monotonic() + self.timeout
+        data, block = None, None
+        try:
+            if self.processes <= 0:
+                data = source
+            else:
+                size = _source_size(source)
+                if size is not None and size <= extraction_config.spool_max_mb * 1024 * 1024:
+                    block = _share(source, size)
+                    data = _SharedPdf(block.name, size)
+                else:
+                    data = _spill_to_file(source)
+            pages = self._map(_pdf_page_count, [(data,)], deadline)[0]
+            if pages > self.max_pages:
+                logger.warning(f"{name or 'PDF'} has {pages} pages, extracting the first {self.max_pages}")
+                self._count("truncated")
+                pages = self.max_pages
+            ranges = [(data, start, min(start + self.pages_per_task, pages)) for start in range(0, pages, self.pages_per_task)]
+            parts = self._map(_pdf_page_text, ranges, deadline)
+        except multiprocessing.TimeoutError:
+            self._count("timeouts")
+            raise ExtractionError(f"PDF extraction timed out after {self.timeout:g}s")
+        except Exception as e:
+            self._count("failures")
+            raise ExtractionError(f"Could not parse PDF: {e}")
+        finally:
+            if block is not None:
+                block.close()
+                block.unlink()
+            elif isinstance(data, str):
+                os.unlink(data)
+
+        self._count("documents")
+        self._count("pages", pages)
+        return "\n".join(parts)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self._stats, "processes": self.processes, "timeout": self.timeout, "max_pages": self.max_pages}
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
+
+
+# Global extractor; its worker processes start on first use
+pdf_extractor = PdfExtractor(
+    processes=extraction_config.processes,
+    timeout=extraction_config.timeout,
+    max_pages=extraction_config.max_pages,
+    pages_per_task=extraction_config.pages_per_task,
+)
+
+
+def extract_in_parallel(
+    load: Callable[[T], str],
+    sources: Iterable[Tuple[str, T]],
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[str, Union[str, ExtractionError]]]:
+    """Yield (name, text or the ExtractionError) for each source, in order
+
+    Up to two files per worker are extracted ahead of the consumer, so
+    extraction of later files overlaps with scoring of earlier ones.
+    """
+    workers = max(1, workers or extraction_config.parallel_files)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as executor:
+        window: deque = deque()
+        iterator = iter(sources)
+        exhausted = False
+        while window or not exhausted:
+            while not exhausted and len(window) < 2 * workers:
+                try:
+                    name, source = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                window.append((name, executor.submit(load, source)))
+            if not window:
+                break
+            name, future = window.popleft()
+            try:
+                yield name, future.result()
+            except ExtractionError as e:
+                yield name, e
@@ -0,0 +1,56 @@
+"""Multi-process deployment that loads the embedding model once, before forking
+
+    gunicorn -c gunicorn.conf.py                        # threaded Flask workers
+    SERVING_MODE=async gunicorn -c gunicorn.conf.py     # async workers (asgi_app.py)
+
+The app is imported in the master with PRELOAD_MODEL=true, so on CPU the model
+weights are loaded there and every worker shares them copy-on-write instead of
+holding its own copy. CUDA does not survive a fork, so on a GPU each worker
+loads the model itself after the fork.
+"""
+import gc
+import os
+
+# Read by config.py when the app is imported in the master below
+os.environ.setdefault("PRELOAD_MODEL", "true")
+# Job workers are separate processes (`python job_worker.py`), not children of every web worker
+os.environ.setdefault("JOB_WORKERS", "0")
+# Lets the master check for a GPU through NVML without initializing CUDA before it forks
+os.environ.setdefault("PYTORCH_NVML_BASED_CUDA_CHECK", "1")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+preload_app = True
+# Long enough for an analysis that waits the full LLM timeout
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+if os.getenv("SERVING_MODE", "sync").lower() == "async":
+    wsgi_app = "asgi_app:app"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "app:app"
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the collector's generations, so
+    # garbage collection in the workers does not write to (and copy) those pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from config import embedding_config
+    from model_registry import model_registry
+
+    try:
+        import torch
+
+        # Split the cores between workers instead of every worker using all of them
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    except ImportError:
+        pass
+    if embedding_config.warmup or not model_registry.is_ready():
+        # Inference thread pools are per process, so each worker runs its own warmup
+        # encode; on a GPU the master did not preload, so this also loads the model
+        model_registry.start_warmup()
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from analyze import extract_features, round_scores, score_batch
+from batching import encode_texts
+from config import embedding_config, storage_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class JobCatalog:
+    """Catalog of open roles with precomputed JD embeddings and heuristic features"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        # (job ids, embedding matrix) swapped as one tuple so readers always see matching rows
+        self._index = ([], np.zeros((0, 0), dtype=np.float32))
+        # Model and backend the stored embeddings were encoded with
+        self._model: Optional[str] = embedding_config.model_identity()
+        if directory:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._index[0])
+
+    def add_jobs(self, jobs: List[Dict]) -> List[str]:
+        """Add or replace jobs given as dicts with id, description and optional title"""
+        if not jobs:
+            return []
+        # A payload may repeat an id; the last entry wins
+        unique = {str(job["id"]): job for job in jobs}
+        texts = [job["description"] for job in unique.values()]
+        embeddings = encode_texts(texts)
+
+        with self._lock:
+            self._reencode_if_stale()
+            ids, matrix = self._index
+            rows = {job_id: i for i, job_id in enumerate(ids)}
+            ids = list(ids)
+            matrix = matrix.copy() if len(ids) else np.zeros((0, embeddings.shape[1]), dtype=np.float32)
+            jobs_by_id = dict(self._jobs)
+            new_rows = []
+            for job_id, embedding in zip(unique, embeddings):
+                job = unique[job_id]
+                jobs_by_id[job_id] = {
+                    "title": job.get("title") or job_id,
+                    "description": job["description"],
+                    "features": extract_features(job["description"], is_jd=True),
+                }
+                if job_id in rows:
+                    matrix[rows[job_id]] = embedding
+                else:
+                    rows[job_id] = len(ids)
+                    ids.append(job_id)
+                    new_rows.append(embedding)
+            if new_rows:
+                matrix = np.vstack([matrix, np.stack(new_rows)])
+            # Swap the index before the job table so readers never see an id without a row
+            self._index = (ids, matrix)
+            self._jobs = jobs_by_id
+            self._save()
+        return list(unique)
+
+    def remove_job(self, job_id: str) -> bool:
+        """Remove a job from the catalog"""
+        with self._lock:
+            ids, matrix = self._index
+            if job_id not in self._jobs or job_id not in ids:
+                return False
+            row = ids.index(job_id)
+            self._index = (ids[:row] + ids[row + 1:], np.delete(matrix, row, axis=0))
+            self._jobs = {other: job for other, job in self._jobs.items() if other != job_id}
+            self._save()
+        return True
+
+    def list_jobs(self) -> List[Dict]:
+        """List catalog entries without their embeddings"""
+        ids, jobs = self._index[0], self._jobs
+        return [{"id": job_id, "title": jobs[job_id]["title"]} for job_id in ids if job_id in jobs]
+
+    def match(self, resume_text: str, top_k: int = 10, candidates: Optional[int] = None) -> List[Dict]:
+        """Rank catalog jobs for one resume.
+
+        All jobs are ranked by semantic similarity with one matrix-vector
+        product; heuristic sub-scores are computed only for the best
+        ``candidates`` jobs (default ``4 * top_k``) before the final ranking.
+        """
+        if self._model != embedding_config.model_identity():
+            with self._lock:
+                self._reencode_if_stale()
+        ids, matrix = self._index
+        if not ids:
+            return []
+
+        resume_embedding = encode_texts([resume_text])[0]
+        similarities = matrix @ resume_embedding
+
+        candidates = min(len(ids), max(top_k, candidates or 4 * top_k))
+        if candidates < len(ids):
+            best = np.argpartition(-similarities, candidates - 1)[:candidates]
+        else:
+            best = np.arange(len(ids))
+
+        resume_features = extract_features(resume_text)
+        results = []
+        for row in best:
+            job = self._jobs.get(ids[row])
+            if job is None:
+                continue
+            scores = score_batch([resume_features], job["features"], similarities[row:row + 1])[0]
+            results.append({"jobId": ids[row], "title": job["title"], **round_scores(scores)})
+
+        results.sort(key=lambda r: -r["overallMatch"])
+        return results[:top_k]
+
+    def _reencode_if_stale(self) -> None:
+        """Re-encode every job when the embeddings came from another model or backend; caller holds the lock"""
+        identity = embedding_config.model_identity()
+        if self._model == identity:
+            return
+        ids, _ = self._index
+        if ids:
+            logger.info(f"Re-encoding {len(ids)} catalog jobs for {identity} (saved with {self._model})")
+            matrix = encode_texts([self._jobs[job_id]["description"] for job_id in ids])
+            self._index = (list(ids), np.asarray(matrix, dtype=np.float32))
+        self._model = identity
+        self._save()
+
+    def _save(self) -> None:
+        """Write the catalog to disk, replacing the previous files atomically"""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        ids, matrix = self._index
+        meta = {
+            "model": self._model,
+            "jobs": [
+                {"id": job_id, "title": self._jobs[job_id]["title"], "description": self._jobs[job_id]["description"]}
+                for job_id in ids
+            ],
+        }
+        meta_path = os.path.join(self.directory, "jobs.json")
+        matrix_path = os.path.join(self.directory, "embeddings.npy")
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        with open(matrix_path + ".tmp", "wb") as f:
+            np.save(f, matrix)
+        os.replace(matrix_path + ".tmp", matrix_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def _load(self) -> None:
+        """Load a saved catalog and rebuild the heuristic features"""
+        meta_path = os.path.join(self.directory, "jobs.json")
+        matrix_path = os.path.join(self.directory, "embeddings.npy")
+        if not (os.path.exists(meta_path) and os.path.exists(matrix_path)):
+            return
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            matrix = np.load(matrix_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load job catalog from {self.directory}: {e}")
+            return
+        # Catalogs saved before the model was recorded are re-encoded on first use
+        if isinstance(saved, list):
+            saved = {"model": None, "jobs": saved}
+        meta = saved["jobs"]
+        if len(meta) != len(matrix):
+            logger.warning("Job catalog metadata and embeddings are out of sync, ignoring saved catalog")
+            return
+
+        for job in meta:
+            self._jobs[job["id"]] = {
+                "title": job["title"],
+                "description": job["description"],
+                "features": extract_features(job["description"], is_jd=True),
+            }
+        self._index = ([job["id"] for job in meta], matrix.astype(np.float32, copy=False))
+        self._model = saved.get("model")
+        logger.info(f"Loaded {len(meta)} jobs from catalog")
+
+
+# Global catalog instance
+job_catalog = JobCatalog(storage_config.catalog_dir if storage_config.persist_catalog else None)
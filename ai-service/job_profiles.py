@@ -0,0 +1,220 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from analyze import SKILLS_VERSION, extract_features
+from batching import encode_texts
+from chunking import encode_documents
+from config import embedding_config, storage_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, eq=False)
+class JobProfile:
+    """Immutable, precompiled view of a job description used for scoring resumes against it"""
+
+    job_id: str
+    text: str
+    model: str
+    skills_version: str
+    tokens: Tuple[str, ...]
+    skills: FrozenSet[str]
+    years: int
+    edu_hits: int
+    top_keywords: Tuple[str, ...]
+    embedding: np.ndarray
+    created_at: float
+
+    @property
+    def features(self) -> Dict:
+        """JD features in the shape expected by analyze.score_batch"""
+        return {
+            "tokens": self.tokens,
+            "token_counts": Counter(self.tokens),
+            "skills": self.skills,
+            "years": self.years,
+            "edu_hits": self.edu_hits,
+            "top_keywords": list(self.top_keywords),
+        }
+
+    def chunk_embeddings(self) -> np.ndarray:
+        """JD embedding matrix for chunked semantic matching; chunk embeddings come from the embedding cache"""
+        if not embedding_config.chunking:
+            return self.embedding[None, :]
+        return encode_documents([self.text])[0]
+
+    def is_current(self) -> bool:
+        """Check that the profile was compiled with the current model, backend and skill dictionary"""
+        return self.model == embedding_config.model_identity() and self.skills_version == SKILLS_VERSION
+
+    def summary(self) -> Dict:
+        return {
+            "jobId": self.job_id,
+            "model": self.model,
+            "skillsVersion": self.skills_version,
+            "skills": sorted(self.skills),
+            "years": self.years,
+            "educationHits": self.edu_hits,
+            "topKeywords": list(self.top_keywords),
+            "createdAt": self.created_at,
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "text": self.text,
+            "model": self.model,
+            "skills_version": self.skills_version,
+            "tokens": list(self.tokens),
+            "skills": sorted(self.skills),
+            "years": self.years,
+            "edu_hits": self.edu_hits,
+            "top_keywords": list(self.top_keywords),
+            "embedding": self.embedding.tolist(),
+            "created_at": self.created_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "JobProfile":
+        embedding = np.asarray(data["embedding"], dtype=np.float32)
+        embedding.flags.writeable = False
+        return cls(
+            job_id=data["job_id"],
+            text=data["text"],
+            model=data["model"],
+            skills_version=data["skills_version"],
+            tokens=tuple(data["tokens"]),
+            skills=frozenset(data["skills"]),
+            years=int(data["years"]),
+            edu_hits=int(data["edu_hits"]),
+            top_keywords=tuple(data["top_keywords"]),
+            embedding=embedding,
+            created_at=float(data["created_at"]),
+        )
+
+
+def profile_id(jd_text: str) -> str:
+    """Content-derived job id, so registering the same JD twice returns the same id"""
+    return hashlib.sha256(jd_text.encode("utf-8")).hexdigest()[:16]
+
+
+def compile_job_profile(jd_text: str, job_id: Optional[str] = None) -> JobProfile:
+    """Precompute every JD-side artifact used by compute_scores"""
+    features = extract_features(jd_text, is_jd=True)
+    embedding = np.array(encode_texts([jd_text])[0], dtype=np.float32)
+    embedding.flags.writeable = False
+    return JobProfile(
+        job_id=job_id or profile_id(jd_text),
+        text=jd_text,
+        model=embedding_config.model_identity(),
+        skills_version=SKILLS_VERSION,
+        tokens=tuple(features["tokens"]),
+        skills=frozenset(features["skills"]),
+        years=features["years"],
+        edu_hits=features["edu_hits"],
+        top_keywords=tuple(features["top_keywords"]),
+        embedding=embedding,
+        created_at=time.time(),
+    )
+
+
+class JobProfileStore:
+    """Registry of compiled job profiles, persisted as one JSON file per profile"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._profiles: Dict[str, JobProfile] = {}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".json"):
+                    self._load(name[:-len(".json")])
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def register(self, jd_text: str) -> JobProfile:
+        """Compile and store a JD, reusing an existing current profile for the same text"""
+        existing = self.get(profile_id(jd_text))
+        if existing is not None:
+            return existing
+        profile = compile_job_profile(jd_text)
+        with self._lock:
+            self._profiles[profile.job_id] = profile
+            self._save(profile)
+        logger.info(f"Registered job profile {profile.job_id}")
+        return profile
+
+    def get(self, job_id: str) -> Optional[JobProfile]:
+        """Get a current profile, checking disk for profiles registered by other workers"""
+        profile = self._profiles.get(job_id)
+        if profile is None and self.directory:
+            profile = self._load(job_id)
+        if profile is not None and not profile.is_current():
+            # Compiled with another model or skill dictionary: rebuild under the same id
+            logger.info(f"Recompiling stale job profile {job_id} ({profile.model}/{profile.skills_version})")
+            profile = compile_job_profile(profile.text, job_id)
+            with self._lock:
+                self._profiles[job_id] = profile
+                self._save(profile)
+        return profile
+
+    def remove(self, job_id: str) -> bool:
+        """Forget a profile and delete its file; False if it was not registered"""
+        with self._lock:
+            removed = self._profiles.pop(job_id, None) is not None
+            if self.directory:
+                try:
+                    os.unlink(self._path(job_id))
+                    removed = True
+                except OSError:
+                    pass
+        return removed
+
+    def list_profiles(self) -> List[Dict]:
+        return [profile.summary() for profile in list(self._profiles.values())]
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _save(self, profile: JobProfile) -> None:
+        if not self.directory:
+            return
+        path = self._path(profile.job_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(profile.to_dict(), f)
+        os.replace(path + ".tmp", path)
+
+    def _load(self, job_id: str) -> Optional[JobProfile]:
+        """Load one profile from disk"""
+        if not job_id.isalnum():
+            return None
+        path = self._path(job_id)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                profile = JobProfile.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable job profile {job_id}: {e}")
+            return None
+
+        with self._lock:
+            self._profiles[job_id] = profile
+        return profile
+
+
+# Global profile store
+job_profiles = JobProfileStore(storage_config.profiles_dir)
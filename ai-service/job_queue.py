@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from config import job_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+class JobQueue:
+    """Durable SQLite-backed queue of analysis jobs shared by the API and worker processes
+
+    A claimed job stays invisible to other workers for visibility_timeout
+    seconds, extended on every progress update. If its worker dies the job
+    becomes claimable again, until it has been attempted max_attempts times.
+    """
+
+    def __init__(self, path: str, visibility_timeout: float = 300.0, max_attempts: int = 3):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max(1, max_attempts)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect()
+        # SQLite connections must not cross a fork; forked server workers open their own
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, result TEXT, error TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, done INTEGER NOT NULL DEFAULT 0, total INTEGER NOT NULL, "
+                "worker TEXT, visible_at REAL NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, visible_at)")
+
+    def enqueue(self, payload: Dict, job_id: Optional[str] = None) -> str:
+        """Store a new job and return its id"""
+        job_id = job_id or new_job_id()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, total, visible_at, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(payload), len(payload.get("resumes", [])), now, now, now),
+            )
+        return job_id
+
+    def claim(self, worker: str, limit: int = 1) -> List[Dict]:
+        """Atomically take up to limit visible jobs, oldest first"""
+        now = time.time()
+        claimed = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, payload, attempts FROM jobs WHERE status IN ('queued', 'running') "
+                    "AND visible_at <= ? ORDER BY created_at LIMIT ?",
+                    (now, max(1, limit)),
+                ).fetchall()
+                for job_id, payload, attempts in rows:
+                    if attempts >= self.max_attempts:
+                        logger.warning(f"Job {job_id} failed after {attempts} attempts")
+                        self._conn.execute(
+                            "UPDATE jobs SET status = 'failed', error = ?, worker = NULL, updated_at = ? WHERE id = ?",
+                            (f"Worker stopped responding on all {attempts} attempts", now, job_id),
+                        )
+                        continue
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, done = 0, "
+                        "visible_at = ?, updated_at = ? WHERE id = ?",
+                        (worker, now + self.visibility_timeout, now, job_id),
+                    )
+                    claimed.append({"id": job_id, "payload": json.loads(payload), "attempt": attempts + 1})
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def _update_owned(self, job_id: str, worker: str, assignments: str, params: tuple) -> bool:
+        """Update a running job only if this worker still owns it"""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (*params, time.time(), job_id, worker),
+            )
+        return cursor.rowcount > 0
+
+    def progress(self, job_id: str, worker: str, done: int) -> bool:
+        """Record progress and extend the visibility timeout; False if the job was taken over"""
+        return self._update_owned(job_id, worker, "done = ?, visible_at = ?", (done, time.time() + self.visibility_timeout))
+
+    def complete(self, job_id: str, worker: str, result: Dict) -> bool:
+        return self._update_owned(
+            job_id, worker, "status = 'done', result = ?, done = total", (json.dumps(result),)
+        )
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        return self._update_owned(job_id, worker, "status = 'failed', error = ?", (error,))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Status, progress and, once finished, the result or error of one job"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, result, error, attempts, done, total, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        status, result, error, attempts, done, total, created_at, updated_at = row
+        job = {
+            "jobId": job_id,
+            "status": status,
+            "progress": {"done": done, "total": total},
+            "attempts": attempts,
+            "createdAt": created_at,
+            "updatedAt": updated_at,
+        }
+        if result is not None:
+            job["result"] = json.loads(result)
+        if error is not None:
+            job["error"] = error
+        return job
+
+    def stats(self) -> Dict:
+        """Number of jobs in each status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update(dict(rows))
+        return counts
+
+
+# Global job queue
+job_queue = JobQueue(job_config.db_path, job_config.visibility_timeout, job_config.max_attempts)
@@ -0,0 +1,186 @@
+import argparse
+import atexit
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from analyze import compute_scores, load_resume_text
+from config import job_config
+from extraction import ExtractionError, extract_in_parallel
+from job_profiles import job_profiles
+from job_queue import JobQueue, job_queue
+from model_registry import model_registry
+from ranking import ResumeText, rank_resumes, ranking_record
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds between progress writes, which also extend the job's visibility timeout
+PROGRESS_INTERVAL = 1.0
+
+
+class JobLostError(Exception):
+    """The job's visibility timeout expired and another worker took it over"""
+
+
+def _load_resume(item: Dict) -> str:
+    return load_resume_text(item["path"]) if "path" in item else item.get("text", "")
+
+
+def _iter_resumes(items: List[Dict]) -> Iterator[Tuple[str, ResumeText]]:
+    """Yield (id, text or extraction error) for resumes given inline or as files saved with the job"""
+    return extract_in_parallel(_load_resume, [(str(item.get("id", i)), item) for i, item in enumerate(items)])
+
+
+def _score_with_llm(jd_text: str, resumes: Iterable[Tuple[str, ResumeText]], job_profile=None) -> Iterator[Dict]:
+    """Full analysis of each resume including the LLM, in the record format of rank_resumes"""
+    ranking = []
+    for resume_id, text in resumes:
+        if isinstance(text, ExtractionError):
+            yield {"type": "error", "id": resume_id, "error": str(text)}
+            continue
+        if not text.strip():
+            yield {"type": "error", "id": resume_id, "error": "Could not extract text from resume file"}
+            continue
+        result = compute_scores(text, jd_text, use_llm=True, resume_name=resume_id, job_profile=job_profile)
+        ranking.append({"id": resume_id, "overallMatch": result["overallMatch"]})
+        yield {"type": "candidate", "id": resume_id, **result}
+    yield ranking_record(ranking)
+
+
+def analyze_job(payload: Dict, on_progress: Optional[Callable[[int], None]] = None) -> Dict:
+    """Score every resume of a bulk job against its JD; returns candidates, per-resume errors and the ranking"""
+    job_profile = None
+    if payload.get("jobId"):
+        job_profile = job_profiles.get(str(payload["jobId"]))
+        if job_profile is None:
+            raise ValueError("Unknown jobId")
+    jd_text = job_profile.text if job_profile is not None else payload["jobDescription"]
+
+    resumes = _iter_resumes(payload.get("resumes", []))
+    if payload.get("useLLM"):
+        records = _score_with_llm(jd_text, resumes, job_profile)
+    else:
+        records = rank_resumes(jd_text, resumes, chunk_size=int(payload.get("chunkSize", 64)))
+
+    candidates: List[Dict] = []
+    errors: List[Dict] = []
+    ranking: List[Dict] = []
+    for record in records:
+        record_type = record.pop("type")
+        if record_type == "candidate":
+            candidates.append(record)
+        elif record_type == "error":
+            errors.append(record)
+        else:
+            ranking = record["ranking"]
+        if on_progress is not None:
+            on_progress(len(candidates) + len(errors))
+    return {"candidates": candidates, "errors": errors, "ranking": ranking}
+
+
+def process_job(queue: JobQueue, worker: str, job: Dict) -> None:
+    """Run one claimed job and store its result, keeping its claim alive while it runs"""
+    job_id = job["id"]
+    last_update = time.monotonic()
+
+    def on_progress(done: int) -> None:
+        nonlocal last_update
+        if time.monotonic() - last_update >= PROGRESS_INTERVAL:
+            last_update = time.monotonic()
+            if not queue.progress(job_id, worker, done):
+                raise JobLostError(job_id)
+
+    logger.info(f"Worker {worker} processing job {job_id} (attempt {job['attempt']})")
+    try:
+        result = analyze_job(job["payload"], on_progress)
+        finished = queue.complete(job_id, worker, result)
+    except JobLostError:
+        logger.warning(f"Job {job_id} was taken over by another worker")
+        return
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}")
+        finished = queue.fail(job_id, worker, str(e))
+
+    if finished:
+        shutil.rmtree(os.path.join(job_config.upload_dir, job_id), ignore_errors=True)
+
+
+def run_worker(parent_pid: Optional[int] = None) -> None:
+    """Worker process loop: load the embedding model once, then claim and process jobs in batches
+
+    The jobs of one batch run concurrently so their encode calls are merged
+    into shared forward passes by the encode batcher.
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    model_registry.warmup()
+    logger.info(f"Job worker {worker} ready")
+    with ThreadPoolExecutor(max_workers=max(1, job_config.batch_size), thread_name_prefix="job") as executor:
+        while parent_pid is None or os.getppid() == parent_pid:
+            jobs = job_queue.claim(worker, job_config.batch_size)
+            if not jobs:
+                time.sleep(job_config.poll_interval)
+                continue
+            list(executor.map(lambda job: process_job(job_queue, worker, job), jobs))
+    logger.info(f"Job worker {worker} exiting: parent process is gone")
+
+
+class WorkerPool:
+    """Job worker processes started alongside the service"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._processes: List[multiprocessing.Process] = []
+
+    def start(self) -> None:
+        if self._processes or self.size <= 0:
+            return
+        if multiprocessing.parent_process() is not None:
+            return  # spawned children re-import the parent's main module; never nest pools
+        # Spawn gives each worker a fresh interpreter instead of forking the server's threads
+        context = multiprocessing.get_context("spawn")
+        for i in range(self.size):
+            process = context.Process(target=run_worker, args=(os.getpid(),), name=f"job-worker-{i}")
+            process.start()
+            self._processes.append(process)
+        atexit.register(self.stop)
+        logger.info(f"Started {self.size} job worker processes")
+
+    def join(self) -> None:
+        for process in self._processes:
+            process.join()
+
+    def stop(self) -> None:
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            process.join(timeout=5)
+        self._processes = []
+
+    def stats(self) -> Dict:
+        return {"configured": self.size, "alive": sum(1 for p in self._processes if p.is_alive())}
+
+
+# Global worker pool, started by the service when JOB_WORKERS > 0
+job_workers = WorkerPool(job_config.workers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process queued analysis jobs")
+    parser.add_argument("--workers", type=int, default=max(1, job_config.workers), help="Worker processes to run")
+    args = parser.parse_args()
+
+    pool = WorkerPool(args.workers)
+    pool.start()
+    pool.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import requests
+
+from bench_corpus import make_document, make_jd, make_pdf, make_resume
+from stub_llm_server import StubLLMServer, add_behavior_arguments, behavior_from_args
+
+ENDPOINTS = ("analyze-text", "analyze")
+
+# The Node backend gives up on the ai-service after this many seconds
+BACKEND_TIMEOUT = 60.0
+
+
+class Corpus:
+    """Resumes and JDs replayed by the load generator"""
+
+    def __init__(self, resumes: List[Dict], jds: List[str]):
+        self.resumes = resumes
+        self.jds = jds
+
+    @classmethod
+    def synthetic(cls, pages: List[int], formats: List[str], per_size: int) -> "Corpus":
+        resumes = []
+        for size, fmt, seed in itertools.product(pages, formats, range(per_size)):
+            name, data = make_document(size, fmt, seed)
+            lines = make_resume(size, seed)
+            resumes.append({"name": name, "data": data, "text": "\n".join(lines), "lines": lines})
+        return cls(resumes, [make_jd(seed) for seed in range(max(1, per_size))])
+
+    @classmethod
+    def from_directory(cls, path: str) -> "Corpus":
+        """.txt and .pdf resumes of a directory; jd*.txt files are used as job descriptions"""
+        resumes, jds = [], []
+        for name in sorted(os.listdir(path)):
+            with open(os.path.join(path, name), "rb") as f:
+                data = f.read()
+            if name.startswith("jd") and name.endswith(".txt"):
+                jds.append(data.decode("utf-8", errors="ignore"))
+            elif name.lower().endswith((".txt", ".pdf")):
+                text = data.decode("utf-8", errors="ignore") if name.lower().endswith(".txt") else None
+                resumes.append({"name": name, "data": data, "text": text, "lines": None})
+        if not resumes:
+            raise SystemExit(f"No .txt or .pdf resumes in {path}")
+        return cls(resumes, jds or [make_jd()])
+
+
+def unique_upload(resume: Dict, n: int) -> bytes:
+    """Upload bytes that differ per request, so the text cache misses and extraction runs every time
+
+    Synthetic PDFs are rebuilt with the marker as an extra line. PDFs read from
+    a directory only get a trailing comment, which leaves their extracted text
+    (and so the resume embedding) unchanged.
+    """
+    if not resume["name"].lower().endswith(".pdf"):
+        return resume["data"] + f"\nRequest {n}".encode("utf-8")
+    if resume["lines"] is not None:
+        return make_pdf(resume["lines"] + [f"Request {n}"])
+    return resume["data"] + f"%Request {n}\n".encode("ascii")
+
+
+class LoadTest:
+    """Replays a corpus against the service and records every request's outcome"""
+
+    def __init__(self, url: str, corpus: Corpus, endpoints: List[str], use_llm: bool, timeout: float, unique: bool):
+        self.url = url.rstrip("/")
+        self.corpus = corpus
+        self.endpoints = endpoints
+        self.use_llm = use_llm
+        self.timeout = timeout
+        self.unique = unique
+        self._counter = itertools.count()
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _send(self, n: int) -> requests.Response:
+        resume = self.corpus.resumes[n % len(self.corpus.resumes)]
+        jd = self.corpus.jds[n % len(self.corpus.jds)]
+        endpoint = self.endpoints[n % len(self.endpoints)]
+        if endpoint == "analyze-text" and resume["text"] is None:
+            endpoint = "analyze"  # PDFs from a corpus directory can only be uploaded
+        # A per-request marker defeats the text, embedding and LLM caches
+        marker = f"\nRequest {n}" if self.unique else ""
+        if endpoint == "analyze-text":
+            body = {"resumeText": resume["text"] + marker, "jobDescription": jd, "use_llm": self.use_llm}
+            return self._session().post(f"{self.url}/analyze-text", json=body, timeout=self.timeout)
+        form = {"jobDescription": jd + marker, "use_llm": str(self.use_llm).lower()}
+        data = unique_upload(resume, n) if self.unique else resume["data"]
+        files = {"resume": (resume["name"], data)}
+        return self._session().post(f"{self.url}/analyze", data=form, files=files, timeout=self.timeout)
+
+    def request(self, scheduled: Optional[float] = None) -> Dict:
+        """Send one request; latency counts from its scheduled start so queueing in the client is included"""
+        n = next(self._counter)
+        start = scheduled if scheduled is not None else time.perf_counter()
+        record: Dict = {"status": None, "error": None, "method": None, "fallback": None}
+        try:
+            response = self._send(n)
+            record["status"] = response.status_code
+            if response.ok:
+                body = response.json()
+                record["method"] = body.get("analysisMethod")
+                record["fallback"] = body.get("llmFallback")
+            else:
+                record["error"] = f"http_{response.status_code}"
+        except requests.Timeout:
+            record["error"] = "timeout"
+        except requests.RequestException as e:
+            record["error"] = type(e).__name__
+        record["latency"] = time.perf_counter() - start
+        return record
+
+    def run_closed(self, concurrency: int, duration: float, max_requests: int) -> List[Dict]:
+        """concurrency workers each sending back to back until the duration or request budget runs out"""
+        records: List[Dict] = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+        sent = itertools.count()
+
+        def worker() -> None:
+            while time.perf_counter() < deadline and next(sent) < max_requests:
+                record = self.request()
+                with lock:
+                    records.append(record)
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return records
+
+    def run_open(self, rate: float, duration: float, max_requests: int, max_inflight: int) -> List[Dict]:
+        """Poisson arrivals at rate requests per second, independent of how fast responses come back"""
+        rng = random.Random(0)
+        futures = []
+        with ThreadPoolExecutor(max_workers=max_inflight) as executor:
+            start = time.perf_counter()
+            next_at = start
+            while next_at - start < duration and len(futures) < max_requests:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(executor.submit(self.request, next_at))
+                next_at += rng.expovariate(rate)
+            return [future.result() for future in futures]
+
+
+def summarize(records: List[Dict], elapsed: float, timeout: float, use_llm: bool) -> Dict:
+    """Throughput, latency percentiles, error and LLM fallback rates of one load level"""
+    total = len(records)
+    ok = [r for r in records if r["error"] is None]
+    latencies = np.array([r["latency"] for r in records]) if records else np.zeros(1)
+    ok_latencies = np.array([r["latency"] for r in ok]) if ok else np.zeros(1)
+    errors: Dict[str, int] = {}
+    for r in records:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+
+    def percentiles(values: np.ndarray) -> Dict:
+        return {
+            name: round(float(np.percentile(values, q)), 3)
+            for name, q in (("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99), ("max", 100))
+        } | {"mean": round(float(values.mean()), 3)}
+
+    summary = {
+        "requests": total,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed > 0 else 0.0,
+        "latency_seconds": percentiles(latencies),
+        "success_latency_seconds": percentiles(ok_latencies),
+        "error_rate": round((total - len(ok)) / total, 4) if total else 0.0,
+        "errors": errors,
+        "p99_exceeds_timeout": bool(np.percentile(latencies, 99) > timeout),
+    }
+    if use_llm and ok:
+        enhanced = sum(1 for r in ok if r["method"] == "enhanced_llm")
+        summary["llm"] = {
+            "enhanced": enhanced,
+            "fallback_rate": round(1 - enhanced / len(ok), 4),
+            "deadline_fallbacks": sum(1 for r in ok if r["fallback"] == "deadline_exceeded"),
+        }
+    return summary
+
+
+def _wait_for_service(url: str, timeout: float) -> None:
+    """Block until /health reports every model ready, so cold loads are not measured"""
+    deadline = time.monotonic() + timeout
+    states = {}
+    while time.monotonic() < deadline:
+        try:
+            response = requests.get(f"{url}/health", timeout=2)
+            models = response.json().get("models", {}) if response.ok else {}
+            states = {name: m.get("state") for name, m in models.items()}
+            failed = {name: m.get("error") for name, m in models.items() if m.get("state") == "error"}
+            if failed:
+                raise SystemExit(f"Service at {url} failed to load models: {failed}")
+            if states and all(state == "ready" for state in states.values()):
+                return
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    raise SystemExit(
+        f"Service at {url} did not become ready within {timeout:g}s (models: {states or 'unknown'}); "
+        "models only load ahead of traffic with EMBEDDING_WARMUP=true"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test /analyze and /analyze-text, optionally against a stub LLM")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Base URL of the ai-service")
+    parser.add_argument("--spawn-service", action="store_true", help="Start app.py on the --url port for the run")
+    parser.add_argument("--async-service", action="store_true", help="Spawn the async server (asgi_app.py) instead")
+    parser.add_argument("--endpoints", nargs="+", default=["analyze-text"], choices=ENDPOINTS, help="Endpoints to alternate between")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, nargs="+", default=[4], help="Closed-loop client counts; several values run a sweep")
+    load.add_argument("--rate", type=float, nargs="+", help="Open-loop arrival rates in requests per second; several values run a sweep")
+    parser.add_argument("--max-inflight", type=int, default=256, help="Open-loop cap on concurrent requests")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per load level")
+    parser.add_argument("--requests", type=int, default=10 ** 9, help="Request cap per load level")
+    parser.add_argument("--timeout", type=float, default=BACKEND_TIMEOUT, help="Client timeout, matching the backend's")
+    parser.add_argument("--no-llm", action="store_true", help="Send use_llm=false")
+    parser.add_argument("--unique", action="store_true", help="Make every request and upload distinct so caches never hit")
+    parser.add_argument("--corpus", help="Directory of .txt/.pdf resumes and jd*.txt files (synthetic corpus otherwise)")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 5], help="Synthetic resume sizes in pages")
+    parser.add_argument("--formats", nargs="+", default=["txt", "pdf"], choices=["txt", "pdf"])
+    parser.add_argument("--stub", choices=["ollama", "llamacpp", "huggingface"], help="Run a stub LLM server (needs --spawn-service)")
+    add_behavior_arguments(parser, prefix="stub-")
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    if args.stub and not args.spawn_service:
+        parser.error("--stub needs --spawn-service so the service can be pointed at the stub")
+
+    corpus = Corpus.from_directory(args.corpus) if args.corpus else Corpus.synthetic(args.pages, args.formats, 2)
+    stub = StubLLMServer(behavior=behavior_from_args(args, prefix="stub-")).start() if args.stub else None
+    service = None
+    if args.spawn_service:
+        # Warm up so the model is loaded before the first measured request
+        env = dict(os.environ, PORT=args.url.rsplit(":", 1)[-1].strip("/"), EMBEDDING_WARMUP="true")
+        if stub is not None:
+            env.update(LLM_SERVER_TYPE=args.stub, LLM_BASE_URL=stub.url)
+        app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "asgi_app.py" if args.async_service else "app.py")
+        # The service logs to stderr so stdout carries only the report
+        service = subprocess.Popen([sys.executable, app_path], env=env, stdout=sys.stderr)
+
+    try:
+        _wait_for_service(args.url, 120.0)
+        test = LoadTest(args.url, corpus, args.endpoints, not args.no_llm, args.timeout, args.unique)
+        levels = [("rate", r) for r in args.rate] if args.rate else [("concurrency", c) for c in args.concurrency]
+        report = {"url": args.url, "endpoints": args.endpoints, "use_llm": not args.no_llm, "levels": []}
+        for mode, value in levels:
+            start = time.perf_counter()
+            if mode == "rate":
+                records = test.run_open(value, args.duration, args.requests, args.max_inflight)
+            else:
+                records = test.run_closed(int(value), args.duration, args.requests)
+            summary = {mode: value, **summarize(records, time.perf_counter() - start, args.timeout, not args.no_llm)}
+            report["levels"].append(summary)
+            print(
+                f"{mode}={value}: {summary['throughput_rps']} req/s, p50 {summary['latency_seconds']['p50']}s, "
+                f"p99 {summary['latency_seconds']['p99']}s, errors {summary['error_rate']:.1%}",
+                file=sys.stderr, flush=True,
+            )
+        if stub is not None:
+            report["stub"] = {"server_type": args.stub, **stub.behavior.stats}
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait(timeout=30)
+        if stub is not None:
+            stub.stop()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,138 @@
 import json
-import os
-import requests
-from typing import Dict, Optional, Union
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple, Union
 import logging
 
+from config import llm_config
+from tracing import span, traced
+
+if TYPE_CHECKING:
+    import requests
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump whenever the analysis prompt changes so cached analyses are not reused
+PROMPT_VERSION = "1"
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}, "maxItems": 5}
+
+# JSON schema of the analysis; servers that support it only sample tokens that keep the output valid
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "llm_analysis": {
+            "type": "object",
+            "properties": {
+                "overall_assessment": {"type": "string"},
+                "key_strengths": _STRING_LIST,
+                "improvement_areas": _STRING_LIST,
+                "recommendation_score": {"type": "integer", "minimum": 0, "maximum": 100},
+                "detailed_feedback": {"type": "string"},
+            },
+            "required": [
+                "overall_assessment",
+                "key_strengths",
+                "improvement_areas",
+                "recommendation_score",
+                "detailed_feedback",
+            ],
+        }
+    },
+    "required": ["llm_analysis"],
+}
+
+# A complete analysis is a few hundred tokens; with constrained output anything
+# longer is a runaway string, so generation is capped here instead of LLM_MAX_TOKENS
+ANALYSIS_RESPONSE_TOKENS = 600
+STRUCTURED_OUTPUT_MODES = ("schema", "json", "none")
+
+
+class CircuitBreaker:
+    """Tracks LLM server health so requests skip a server that is known to be down
+
+    The circuit opens after failure_threshold consecutive failures and refuses
+    requests without touching the network. Once cooldown seconds have passed a
+    single trial request is let through (half-open); its outcome, or that of a
+    background health probe, closes or reopens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logger.info("LLM server is reachable again, closing circuit")
+            self.state = "closed"
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"LLM server unavailable after {self.consecutive_failures} failures, opening circuit")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
 
 class LocalLLMClient:
     """Client for interacting with local LLM servers (Ollama, llama.cpp, HuggingFace)"""
     
-    def __init__(self, server_type: str = "ollama", base_url: str = None, model: str = None):
+    def __init__(
+        self,
+        server_type: str = "ollama",
+        base_url: str = None,
+        model: str = None,
+        timeout: float = 30,
+        temperature: float = 0.3,
+        max_tokens: int = 1000,
+        pool_size: int = 10,
+        connect_timeout: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+        structured_output: str = "schema",
+    ):
         self.server_type = server_type.lower()
-        self.base_url = base_url or self._get_default_url()
+        self.base_url = (base_url or self._get_default_url()).rstrip("/")
         self.model = model or self._get_default_model()
+        self.timeout = timeout
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        if structured_output not in STRUCTURED_OUTPUT_MODES:
+            logger.warning(f"Unknown structured output mode {structured_output!r}, using 'none'")
+            structured_output = "none"
+        self.structured_output = structured_output
+        self.connect_timeout = connect_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.last_probe: Optional[Dict] = None
+        self.pool_size = max(1, pool_size)
+        self._async_session = None
+        # Imported here so CLI runs without the LLM never load requests
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        # Keep-alive connections reused across requests instead of one TCP/HTTP setup per call
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         
     def _get_default_url(self) -> str:
         """Get default URL based on server type"""
@@ -35,40 +152,247 @@ class LocalLLMClient:
         }
         return defaults.get(self.server_type, "llama3.2")
     
+    @traced("llm_probe")
     def test_connection(self) -> bool:
         """Test if the LLM server is accessible"""
+        health_paths = {"ollama": "/api/tags", "llamacpp": "/health", "huggingface": "/"}
         try:
-            if self.server_type == "ollama":
-                response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-                return response.status_code == 200
-            elif self.server_type == "llamacpp":
-                response = requests.get(f"{self.base_url}/health", timeout=5)
-                return response.status_code == 200
-            elif self.server_type == "huggingface":
-                response = requests.get(f"{self.base_url}/", timeout=5)
+            path = health_paths.get(self.server_type)
+            if path is not None:
+                response = self.session.get(f"{self.base_url}{path}", timeout=(self.connect_timeout, 5))
                 return response.status_code == 200
         except Exception as e:
             logger.warning(f"Failed to connect to {self.server_type} server: {e}")
         return False
+
+    def probe(self) -> bool:
+        """Check server health and feed the result into the circuit breaker"""
+        ok = self.test_connection()
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        self.last_probe = {"ok": ok, "at": time.time()}
+        return ok
+
+    def health(self) -> Dict:
+        """Server identity, circuit state and the last background probe"""
+        return {
+            "server_type": self.server_type,
+            "base_url": self.base_url,
+            "model": self.model,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "last_probe": self.last_probe,
+        }
+
+    def _timeouts(self, timeout: Optional[float]):
+        """(connect, read) timeouts for one call, capped by the configured LLM timeout"""
+        read_timeout = min(timeout, self.timeout) if timeout is not None else self.timeout
+        return (min(self.connect_timeout, read_timeout), read_timeout)
+
+    def _post(self, path: str, payload: Dict, timeout, stream: bool = False) -> "requests.Response":
+        """POST to the server through the pooled session, recording server health"""
+        import requests
+
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=timeout, stream=stream)
+        except requests.exceptions.ConnectionError:
+            self.breaker.record_failure()
+            raise
+        # A read timeout means the server is slow, not down, so only refused
+        # connections and server errors count against the circuit
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
     
-    def generate_analysis(self, resume_text: str, job_description: str) -> Optional[Dict]:
-        """Generate enhanced analysis using local LLM"""
+    def generate_analysis(self, resume_text: str, job_description: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Generate enhanced analysis using local LLM, waiting at most timeout seconds"""
         try:
             prompt = self._create_analysis_prompt(resume_text, job_description)
+            timeout = self._timeouts(timeout)
             
+            with span("llm_generate"):
+                if self.server_type == "ollama":
+                    return self._call_ollama(prompt, timeout)
+                elif self.server_type == "llamacpp":
+                    return self._call_llamacpp(prompt, timeout)
+                elif self.server_type == "huggingface":
+                    return self._call_huggingface(prompt, timeout)
+                else:
+                    logger.error(f"Unsupported server type: {self.server_type}")
+                    return None
+                
+        except Exception as e:
+            logger.error(f"Error generating LLM analysis: {e}")
+            return None
+    
+    async def agenerate_analysis(self, resume_text: str, job_description: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Async variant of generate_analysis; the event loop serves other requests while the server generates"""
+        try:
+            prompt = self._create_analysis_prompt(resume_text, job_description)
             if self.server_type == "ollama":
-                return self._call_ollama(prompt)
+                path, payload = "/api/generate", self._ollama_payload(prompt)
             elif self.server_type == "llamacpp":
-                return self._call_llamacpp(prompt)
+                path, payload = "/completion", self._llamacpp_payload(prompt)
             elif self.server_type == "huggingface":
-                return self._call_huggingface(prompt)
+                path, payload = "/generate", self._huggingface_payload(prompt)
             else:
                 logger.error(f"Unsupported server type: {self.server_type}")
                 return None
-                
+
+            with span("llm_generate"):
+                status, result = await self._apost(path, payload, self._timeouts(timeout))
+            if status != 200:
+                return None
+            if self.server_type == "ollama":
+                return self.parse_analysis(result.get("response", ""))
+            if self.server_type == "llamacpp":
+                return self.parse_analysis(result.get("content", ""))
+            if isinstance(result, list) and len(result) > 0:
+                return self.parse_analysis(result[0].get("generated_text", ""))
+            return None
+
         except Exception as e:
-            logger.error(f"Error generating LLM analysis: {e}")
+            logger.error(f"Error generating LLM analysis: {e!r}")
+            return None
+
+    async def _apost(self, path: str, payload: Dict, timeout) -> Tuple[int, Optional[object]]:
+        """POST through the pooled async session, recording server health like _post
+
+        Returns the status and the decoded JSON body (None unless the status is 200).
+        """
+        import aiohttp
+
+        if self._async_session is None:
+            # Created on first use inside the event loop that will own its connections
+            self._async_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+        connect_timeout, read_timeout = timeout
+        try:
+            async with self._async_session.post(
+                f"{self.base_url}{path}",
+                json=payload,
+                # Waiting for a pooled connection counts against the connect budget
+                timeout=aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout),
+            ) as response:
+                status = response.status
+                body = await response.json(content_type=None) if status == 200 else None
+        except aiohttp.ClientConnectionError:
+            self.breaker.record_failure()
+            raise
+        if status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return status, body
+
+    async def aclose(self) -> None:
+        """Close the async session's connections"""
+        if self._async_session is not None:
+            await self._async_session.close()
+            self._async_session = None
+    
+    def stream_analysis(self, resume_text: str, job_description: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """Generate the analysis with token streaming, yielding text chunks as they arrive
+
+        Join the chunks and pass them to parse_analysis for the final result.
+        HuggingFace servers do not stream and yield the whole response at once.
+        """
+        prompt = self._create_analysis_prompt(resume_text, job_description)
+        timeout = self._timeouts(timeout)
+
+        if self.server_type == "ollama":
+            payload = self._ollama_payload(prompt)
+            payload["stream"] = True
+            path = "/api/generate"
+        elif self.server_type == "llamacpp":
+            payload = self._llamacpp_payload(prompt)
+            payload["stream"] = True
+            path = "/completion"
+        elif self.server_type == "huggingface":
+            payload = self._huggingface_payload(prompt)
+            response = self._post("/generate", payload, timeout)
+            response.raise_for_status()
+            result = response.json()
+            if isinstance(result, list) and len(result) > 0:
+                yield result[0].get("generated_text", "")
+            return
+        else:
+            logger.error(f"Unsupported server type: {self.server_type}")
+            return
+
+        with self._post(path, payload, timeout, stream=True) as response:
+            response.raise_for_status()
+            for raw_line in response.iter_lines():
+                line = raw_line.decode("utf-8", errors="ignore")
+                if not line:
+                    continue
+                # llama.cpp sends Server-Sent Events, Ollama sends one JSON object per line
+                if line.startswith("data: "):
+                    line = line[len("data: "):]
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                chunk = event.get("response") if self.server_type == "ollama" else event.get("content")
+                if chunk:
+                    yield chunk
+                if event.get("done") or event.get("stop"):
+                    break
+
+    @traced("llm_parse")
+    def parse_analysis(self, llm_response: str) -> Optional[Dict]:
+        """Parse and validate the analysis from model output
+
+        Constrained output is parsed strictly. Output from servers that ignore
+        the schema is salvaged by decoding the first JSON object in the text.
+        """
+        try:
+            parsed = json.loads(llm_response)
+        except json.JSONDecodeError:
+            parsed = self._salvage_json(llm_response)
+        analysis = self._validate_analysis(parsed)
+        if analysis is None:
+            logger.warning(f"Failed to parse JSON from {self.server_type} response")
             return None
+        return {"llm_analysis": analysis}
+
+    def _salvage_json(self, text: str) -> Optional[Dict]:
+        """Decode the first JSON object embedded in free-form text, ignoring anything after it"""
+        decoder = json.JSONDecoder()
+        start = text.find("{")
+        while start != -1:
+            try:
+                parsed, _ = decoder.raw_decode(text, start)
+                return parsed
+            except json.JSONDecodeError:
+                start = text.find("{", start + 1)
+        return None
+
+    def _validate_analysis(self, parsed) -> Optional[Dict]:
+        """Check the analysis fields and normalize their types, or return None if unusable"""
+        if not isinstance(parsed, dict):
+            return None
+        analysis = parsed.get("llm_analysis", parsed)
+        if not isinstance(analysis, dict) or "overall_assessment" not in analysis:
+            return None
+
+        validated = {
+            "overall_assessment": str(analysis["overall_assessment"]),
+            "detailed_feedback": str(analysis.get("detailed_feedback", "")),
+        }
+        for field in ("key_strengths", "improvement_areas"):
+            items = analysis.get(field, [])
+            validated[field] = [str(item) for item in items] if isinstance(items, list) else [str(items)]
+        if "recommendation_score" in analysis:
+            try:
+                score = min(100.0, max(0.0, float(analysis["recommendation_score"])))
+                validated["recommendation_score"] = int(score) if score.is_integer() else score
+            except (TypeError, ValueError):
+                pass
+        return validated
     
     def _create_analysis_prompt(self, resume_text: str, job_description: str) -> str:
         """Create a structured prompt for resume analysis"""
@@ -101,38 +425,69 @@ Respond only with valid JSON.
 """
         return prompt
     
-    def _call_ollama(self, prompt: str) -> Optional[Dict]:
+    def _response_tokens(self) -> int:
+        """Generation cap: tight when output is constrained to the analysis object"""
+        if self.structured_output == "none":
+            return self.max_tokens
+        return min(self.max_tokens, ANALYSIS_RESPONSE_TOKENS)
+
+    def _output_schema(self) -> Dict:
+        return ANALYSIS_SCHEMA if self.structured_output == "schema" else {"type": "object"}
+
+    def _ollama_payload(self, prompt: str) -> Dict:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "options": {
+                "temperature": self.temperature,
+                "top_p": 0.9,
+                "num_predict": self._response_tokens()
+            }
+        }
+        if self.structured_output == "schema":
+            payload["format"] = ANALYSIS_SCHEMA
+        elif self.structured_output == "json":
+            payload["format"] = "json"
+        return payload
+    
+    def _llamacpp_payload(self, prompt: str) -> Dict:
+        payload = {
+            "prompt": prompt,
+            "n_predict": self._response_tokens(),
+            "temperature": self.temperature,
+            "top_p": 0.9,
+            "stop": ["</s>"]
+        }
+        if self.structured_output != "none":
+            # The server compiles the schema into a sampling grammar
+            payload["json_schema"] = self._output_schema()
+        return payload
+    
+    def _huggingface_payload(self, prompt: str) -> Dict:
+        payload = {
+            "inputs": prompt,
+            "parameters": {
+                "temperature": self.temperature,
+                "max_new_tokens": self._response_tokens(),
+                "return_full_text": False
+            }
+        }
+        if self.structured_output != "none":
+            # Text Generation Inference guided decoding
+            payload["parameters"]["grammar"] = {"type": "json", "value": self._output_schema()}
+        return payload
+    
+    def _call_ollama(self, prompt: str, timeout=30) -> Optional[Dict]:
         """Call Ollama API"""
         try:
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "top_p": 0.9,
-                    "max_tokens": 1000
-                }
-            }
+            payload = self._ollama_payload(prompt)
             
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=30
-            )
+            response = self._post("/api/generate", payload, timeout)
             
             if response.status_code == 200:
                 result = response.json()
-                llm_response = result.get("response", "")
-                # Extract JSON from response
-                try:
-                    json_start = llm_response.find("{")
-                    json_end = llm_response.rfind("}") + 1
-                    if json_start != -1 and json_end > json_start:
-                        json_str = llm_response[json_start:json_end]
-                        return json.loads(json_str)
-                except json.JSONDecodeError:
-                    logger.warning("Failed to parse JSON from Ollama response")
+                return self.parse_analysis(result.get("response", ""))
                     
             return None
             
@@ -140,35 +495,16 @@ Respond only with valid JSON.
             logger.error(f"Ollama API error: {e}")
             return None
     
-    def _call_llamacpp(self, prompt: str) -> Optional[Dict]:
+    def _call_llamacpp(self, prompt: str, timeout=30) -> Optional[Dict]:
         """Call llama.cpp API"""
         try:
-            payload = {
-                "prompt": prompt,
-                "n_predict": 1000,
-                "temperature": 0.3,
-                "top_p": 0.9,
-                "stop": ["</s>"]
-            }
+            payload = self._llamacpp_payload(prompt)
             
-            response = requests.post(
-                f"{self.base_url}/completion",
-                json=payload,
-                timeout=30
-            )
+            response = self._post("/completion", payload, timeout)
             
             if response.status_code == 200:
                 result = response.json()
-                llm_response = result.get("content", "")
-                # Extract JSON from response
-                try:
-                    json_start = llm_response.find("{")
-                    json_end = llm_response.rfind("}") + 1
-                    if json_start != -1 and json_end > json_start:
-                        json_str = llm_response[json_start:json_end]
-                        return json.loads(json_str)
-                except json.JSONDecodeError:
-                    logger.warning("Failed to parse JSON from llama.cpp response")
+                return self.parse_analysis(result.get("content", ""))
                     
             return None
             
@@ -176,37 +512,17 @@ Respond only with valid JSON.
             logger.error(f"llama.cpp API error: {e}")
             return None
     
-    def _call_huggingface(self, prompt: str) -> Optional[Dict]:
+    def _call_huggingface(self, prompt: str, timeout=30) -> Optional[Dict]:
         """Call HuggingFace inference API"""
         try:
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "temperature": 0.3,
-                    "max_new_tokens": 1000,
-                    "return_full_text": False
-                }
-            }
+            payload = self._huggingface_payload(prompt)
             
-            response = requests.post(
-                f"{self.base_url}/generate",
-                json=payload,
-                timeout=30
-            )
+            response = self._post("/generate", payload, timeout)
             
             if response.status_code == 200:
                 result = response.json()
                 if isinstance(result, list) and len(result) > 0:
-                    llm_response = result[0].get("generated_text", "")
-                    # Extract JSON from response
-                    try:
-                        json_start = llm_response.find("{")
-                        json_end = llm_response.rfind("}") + 1
-                        if json_start != -1 and json_end > json_start:
-                            json_str = llm_response[json_start:json_end]
-                            return json.loads(json_str)
-                    except json.JSONDecodeError:
-                        logger.warning("Failed to parse JSON from HuggingFace response")
+                    return self.parse_analysis(result[0].get("generated_text", ""))
                         
             return None
             
@@ -215,17 +531,67 @@ Respond only with valid JSON.
             return None
 
 
+_client: Optional[LocalLLMClient] = None
+_client_lock = threading.Lock()
+
+
+def _health_loop(client: LocalLLMClient, interval: float) -> None:
+    """Probe the server in the background so requests never wait on a health check"""
+    while True:
+        client.probe()
+        time.sleep(interval)
+
+
+def get_shared_client() -> LocalLLMClient:
+    """Get the process-wide LLM client, creating it and its health checker on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                client = LocalLLMClient(
+                    llm_config.server_type,
+                    llm_config.base_url,
+                    llm_config.model,
+                    timeout=llm_config.timeout,
+                    temperature=llm_config.temperature,
+                    max_tokens=llm_config.max_tokens,
+                    pool_size=llm_config.pool_size,
+                    connect_timeout=llm_config.connect_timeout,
+                    structured_output=llm_config.structured_output,
+                    breaker=CircuitBreaker(llm_config.failure_threshold, llm_config.circuit_cooldown),
+                )
+                threading.Thread(
+                    target=_health_loop,
+                    args=(client, llm_config.health_interval),
+                    name="llm-health",
+                    daemon=True,
+                ).start()
+                logger.info(f"Using {client.server_type} LLM server at {client.base_url}")
+                _client = client
+    return _client
+
+
 def get_llm_client() -> Optional[LocalLLMClient]:
-    """Get configured LLM client from environment variables"""
-    server_type = os.getenv("LLM_SERVER_TYPE", "ollama")
-    base_url = os.getenv("LLM_BASE_URL")
-    model = os.getenv("LLM_MODEL")
-    
-    client = LocalLLMClient(server_type, base_url, model)
-    
-    if client.test_connection():
-        logger.info(f"Connected to {server_type} LLM server at {client.base_url}")
-        return client
-    else:
-        logger.warning(f"Could not connect to {server_type} LLM server")
+    """Get the shared LLM client, or None if LLM is disabled or its server is known to be down
+
+    Server health comes from the circuit breaker, so this never makes a request.
+    """
+    if not llm_config.is_enabled():
+        return None
+    client = get_shared_client()
+    if not client.breaker.allow_request():
         return None
+    return client
+
+
+def llm_health() -> Dict:
+    """Health of the shared LLM client for the /health endpoint"""
+    if not llm_config.is_enabled():
+        return {"enabled": False}
+    return {"enabled": True, **get_shared_client().health()}
+
+
+async def close_async_client() -> None:
+    """Close the shared client's async connections when the ASGI server shuts down"""
+    if _client is not None:
+        await _client.aclose()
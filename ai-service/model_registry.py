@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from config import embedding_config
+from embedding_backends import load_embedding_model
+from tracing import span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Process-wide registry that loads each embedding model once and shares it across threads"""
+
+    def __init__(self):
+        self._models: Dict[str, object] = {}
+        self._status: Dict[str, Dict] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._device: Optional[str] = None
+
+    def resolve_device(self) -> str:
+        """Resolve the inference device once per process"""
+        if self._device is None:
+            if embedding_config.device:
+                self._device = embedding_config.device
+            else:
+                import torch
+                self._device = "cuda" if torch.cuda.is_available() else "cpu"
+        return self._device
+
+    def get_model(self, name: Optional[str] = None):
+        """Return the loaded model, loading it on first use"""
+        name = name or embedding_config.model_name
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Only one thread loads a given model; the others wait for it
+        with load_lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._load(name)
+        return model
+
+    def _load(self, name: str):
+        """Load a model from disk and record its load time"""
+        device = self.resolve_device()
+        backend = embedding_config.backend
+        self._status[name] = {"state": "loading", "device": device, "backend": backend}
+        logger.info(f"Loading embedding model {name} on {device} ({backend})")
+
+        start = time.perf_counter()
+        try:
+            with span("model_load"):
+                model = load_embedding_model(name, backend, device)
+                model.eval()
+        except Exception as e:
+            self._status[name] = {"state": "error", "device": device, "backend": backend, "error": str(e)}
+            logger.error(f"Failed to load embedding model {name}: {e}")
+            raise
+        load_seconds = time.perf_counter() - start
+
+        self._models[name] = model
+        self._status[name] = {
+            "state": "ready",
+            "device": device,
+            "backend": backend,
+            "load_seconds": round(load_seconds, 3),
+        }
+        logger.info(f"Loaded embedding model {name} in {load_seconds:.2f}s")
+        return model
+
+    def warmup(self, name: Optional[str] = None) -> None:
+        """Load a model and run a dummy encode so the first request is fast"""
+        name = name or embedding_config.model_name
+        try:
+            model = self.get_model(name)
+            start = time.perf_counter()
+            model.encode(["warmup"], show_progress_bar=False)
+            self._status[name]["warmup_seconds"] = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            logger.error(f"Embedding model warmup failed: {e}")
+
+    def start_warmup(self, name: Optional[str] = None) -> threading.Thread:
+        """Warm a model in a background thread"""
+        thread = threading.Thread(target=self.warmup, args=(name,), name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        """Check if a model has finished loading"""
+        return (name or embedding_config.model_name) in self._models
+
+    def status(self) -> Dict[str, Dict]:
+        """Get load state and load time for every known model"""
+        status = {name: dict(info) for name, info in self._status.items()}
+        default = embedding_config.model_name
+        if default not in status:
+            status[default] = {"state": "not_loaded"}
+        return status
+
+
+# Global registry instance
+model_registry = ModelRegistry()
+
+
+def get_model(name: Optional[str] = None):
+    """Get a shared embedding model from the global registry"""
+    return model_registry.get_model(name)
@@ -0,0 +1,123 @@
+import glob
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from config import telemetry_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _collapse(frame) -> str:
+    """Stack of a frame in the folded format read by flamegraph.pl and speedscope, root first"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of request threads and saves those of requests slower than a threshold
+
+    One background thread wakes every interval while any request is being
+    profiled, so the cost per request is a dictionary update per sample rather
+    than a tracing hook on every call. Profiles are folded stack files, one per
+    slow request, and the oldest are removed beyond max_files.
+    """
+
+    def __init__(self, threshold_ms: float, interval_ms: float, directory: str, max_files: int):
+        self.threshold = threshold_ms / 1000.0
+        self.interval = max(interval_ms, 1.0) / 1000.0
+        self.directory = directory
+        self.max_files = max_files
+        self._samples: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def begin(self) -> Optional[int]:
+        """Start sampling the calling thread; returns a handle for end, or None when disabled"""
+        if not self.enabled:
+            return None
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._samples[thread_id] = Counter()
+            self._active.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        return thread_id
+
+    def end(self, handle: Optional[int], name: str, seconds: float, timings: Dict[str, float]) -> None:
+        """Stop sampling; save the stacks if the request took at least the threshold"""
+        if handle is None:
+            return
+        with self._lock:
+            samples = self._samples.pop(handle, None)
+        if samples and seconds >= self.threshold:
+            try:
+                path = self._save(name, seconds, samples)
+            except OSError as e:
+                logger.warning(f"Could not save profile of slow {name} request: {e}")
+                return
+            logger.warning(f"Slow {name} request took {seconds * 1000:.0f}ms {timings}; profile saved to {path}")
+
+    def _run(self) -> None:
+        """Sampler loop"""
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, samples in self._samples.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[_collapse(frame)] += 1
+                if not self._samples:
+                    self._active.clear()
+
+    def _save(self, name: str, seconds: float, samples: Counter) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, f"{stamp}-{name}-{seconds * 1000:.0f}ms-{threading.get_ident()}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        with self._lock:
+            self.saved += 1
+
+        profiles = sorted(glob.glob(os.path.join(self.directory, "*.folded")), key=os.path.getmtime)
+        for old in profiles[: max(0, len(profiles) - self.max_files)]:
+            os.unlink(old)
+        return path
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold * 1000,
+            "interval_ms": self.interval * 1000,
+            "saved": self.saved,
+            "directory": self.directory,
+        }
+
+
+# Global profiler, idle unless PROFILE_SLOW_REQUEST_MS is set
+slow_request_profiler = SlowRequestProfiler(
+    threshold_ms=telemetry_config.profile_threshold_ms,
+    interval_ms=telemetry_config.profile_interval_ms,
+    directory=telemetry_config.profile_dir,
+    max_files=telemetry_config.profile_max_files,
+)
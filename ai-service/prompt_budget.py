@@ -0,0 +1,149 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from batching import encode_texts
+from config import llm_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SECTION_HEADINGS = {
+    "summary", "profile", "objective", "about", "about me", "experience", "work experience",
+    "professional experience", "employment", "employment history", "education", "skills",
+    "technical skills", "projects", "certifications", "awards", "publications", "languages",
+    "interests", "volunteer", "volunteering", "references", "responsibilities", "requirements",
+    "qualifications", "preferred qualifications", "nice to have", "benefits", "about the role",
+}
+
+# Sections longer than this are split further so one long block cannot crowd out the rest
+MAX_SECTION_TOKENS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token for English text)"""
+    return (len(text) + 3) // 4
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped) > 40:
+        return False
+    if stripped.lower() in SECTION_HEADINGS:
+        return True
+    return stripped.isupper() and len(stripped.split()) <= 4
+
+
+def _split_long(lines: List[str], max_chars: int) -> List[str]:
+    """Pack lines (or word windows of overlong lines) into pieces of at most max_chars"""
+    pieces: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in lines:
+        words = line.split()
+        parts = [line] if len(line) <= max_chars else [
+            " ".join(words[i:i + max_chars // 8]) for i in range(0, len(words), max_chars // 8)
+        ]
+        for part in parts:
+            if current and size + len(part) > max_chars:
+                pieces.append("\n".join(current))
+                current, size = [], 0
+            current.append(part)
+            size += len(part) + 1
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def split_sections(text: str) -> List[str]:
+    """Split a document into sections at headings and blank lines, in document order"""
+    blocks: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if not line.strip():
+            if blocks[-1]:
+                blocks.append([])
+            continue
+        if _is_heading(line) and blocks[-1]:
+            blocks.append([])
+        blocks[-1].append(line.rstrip())
+
+    sections = []
+    for block in blocks:
+        if not block:
+            continue
+        section = "\n".join(block)
+        if estimate_tokens(section) > MAX_SECTION_TOKENS:
+            sections.extend(_split_long(block, MAX_SECTION_TOKENS * 4))
+        else:
+            sections.append(section)
+    return sections
+
+
+def select_sections(sections: List[str], scores: np.ndarray, budget: int) -> List[int]:
+    """Indices of the highest scoring sections that fit in the token budget, in document order
+
+    If no section fits, the best one is kept anyway; truncate_to_budget cuts it down.
+    """
+    order = np.argsort(-scores, kind="stable")
+    chosen = []
+    used = 0
+    for i in order:
+        tokens = estimate_tokens(sections[i])
+        if used + tokens <= budget:
+            chosen.append(int(i))
+            used += tokens
+    return sorted(chosen) or [int(order[0])]
+
+
+def truncate_to_budget(text: str, budget: int) -> str:
+    """Cut text to about budget tokens, at a word boundary where possible"""
+    max_chars = budget * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    space = cut.rfind(" ")
+    return cut[:space] if space > max_chars // 2 else cut
+
+
+def compact_prompt_texts(
+    resume_text: str,
+    jd_text: str,
+    jd_embedding: Optional[np.ndarray] = None,
+) -> Tuple[str, str, Dict]:
+    """Trim the resume and JD to their token budgets, keeping the sections most relevant to the other document
+
+    Resume sections are ranked by cosine similarity to the JD embedding and JD
+    sections by similarity to the resume embedding. Texts within budget are
+    returned unchanged and cost no encoding. All needed embeddings are
+    computed in one batched, cached encode call.
+    """
+    resume_budget = llm_config.prompt_resume_tokens
+    jd_budget = llm_config.prompt_jd_tokens
+    original_tokens = estimate_tokens(resume_text) + estimate_tokens(jd_text)
+
+    resume_sections = split_sections(resume_text) if 0 < resume_budget < estimate_tokens(resume_text) else []
+    jd_sections = split_sections(jd_text) if 0 < jd_budget < estimate_tokens(jd_text) else []
+    if len(resume_sections) > 1 or len(jd_sections) > 1:
+        documents = {"resume": resume_text, "jd": jd_text}
+        names = (["resume"] if jd_sections else []) + (["jd"] if jd_embedding is None else [])
+        embeddings = encode_texts([documents[name] for name in names] + resume_sections + jd_sections)
+        query_embeddings = dict(zip(names, embeddings))
+        jd_embedding = query_embeddings.get("jd", jd_embedding)
+        section_embeddings = embeddings[len(names):]
+
+        if len(resume_sections) > 1:
+            scores = section_embeddings[:len(resume_sections)] @ jd_embedding
+            chosen = select_sections(resume_sections, scores, resume_budget)
+            resume_text = truncate_to_budget("\n\n".join(resume_sections[i] for i in chosen), resume_budget)
+        if len(jd_sections) > 1:
+            scores = section_embeddings[len(resume_sections):] @ query_embeddings["resume"]
+            chosen = select_sections(jd_sections, scores, jd_budget)
+            jd_text = truncate_to_budget("\n\n".join(jd_sections[i] for i in chosen), jd_budget)
+
+    prompt_tokens = estimate_tokens(resume_text) + estimate_tokens(jd_text)
+    usage = {"promptTokens": prompt_tokens, "tokensSaved": original_tokens - prompt_tokens}
+    if usage["tokensSaved"]:
+        logger.info(f"Compacted LLM prompt from {original_tokens} to {prompt_tokens} tokens")
+    return resume_text, jd_text, usage
@@ -0,0 +1,88 @@
+import logging
+import os
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+
+from analyze import extract_features, load_resume_text, round_scores, score_batch
+from chunking import batch_similarity, encode_documents
+from extraction import ExtractionError, extract_in_parallel
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RESUME_FILE_EXTENSIONS = (".txt", ".pdf")
+
+
+ResumeText = Union[str, ExtractionError]
+
+
+def iter_resume_files(directory: str) -> Iterator[Tuple[str, ResumeText]]:
+    """Yield (file name, extracted text or extraction error) for every resume file in a directory
+
+    Files are extracted in parallel ahead of the consumer.
+    """
+    paths = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and name.lower().endswith(RESUME_FILE_EXTENSIONS):
+            paths.append((name, path))
+    return extract_in_parallel(load_resume_text, paths)
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ranking_record(entries: List[Dict]) -> Dict:
+    """Final ``ranking`` record: entries ordered by overallMatch with their 1-based rank"""
+    ordered = sorted(entries, key=lambda r: -r["overallMatch"])
+    return {
+        "type": "ranking",
+        "count": len(ordered),
+        "ranking": [dict(entry, rank=i + 1) for i, entry in enumerate(ordered)],
+    }
+
+
+def rank_resumes(jd_text: str, resumes: Iterable[Tuple[str, ResumeText]], chunk_size: int = 64) -> Iterator[Dict]:
+    """Score (id, text) resumes against one JD chunk by chunk, then yield the final ranking.
+
+    Each scored resume is yielded as a ``candidate`` record as soon as its chunk
+    is done; the last record has type ``ranking`` and orders every candidate by
+    overallMatch. The JD is tokenized and encoded (or chunked and encoded) once for the whole batch.
+    Resumes given as an ExtractionError or with empty text yield ``error`` records.
+    """
+    jd_features = extract_features(jd_text, is_jd=True)
+    jd_chunks = encode_documents([jd_text])[0]
+
+    ranking: List[Dict] = []
+    for chunk in _chunked(resumes, max(1, chunk_size)):
+        valid = []
+        for resume_id, text in chunk:
+            if isinstance(text, ExtractionError):
+                yield {"type": "error", "id": resume_id, "error": str(text)}
+            elif text.strip():
+                valid.append((resume_id, text))
+            else:
+                yield {"type": "error", "id": resume_id, "error": "Could not extract text from resume file"}
+        if not valid:
+            continue
+
+        texts = [text for _, text in valid]
+        similarities = batch_similarity(encode_documents(texts), jd_chunks)
+        features = [extract_features(text) for text in texts]
+
+        for (resume_id, _), scores in zip(valid, score_batch(features, jd_features, similarities)):
+            record = {"type": "candidate", "id": resume_id, **round_scores(scores)}
+            ranking.append({"id": resume_id, "overallMatch": record["overallMatch"]})
+            yield record
+
+    logger.info(f"Ranked {len(ranking)} resumes")
+    yield ranking_record(ranking)
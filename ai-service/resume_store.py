@@ -0,0 +1,228 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import embedding_config, storage_config
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows: appends are only serialized within one process
+    fcntl = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def resume_id(text: str) -> str:
+    """Stable id of a resume derived from its whitespace-normalized text"""
+    normalized = " ".join(text.split()).lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+class ResumeStore:
+    """Persistent store of resume embeddings with exact and approximate top-K search.
+
+    Embeddings live in ``vectors.f32``, a raw float32 matrix that is only ever
+    appended to and is read through ``np.memmap``. ``meta.jsonl`` is an
+    append-only log with one metadata record per row. An optional IVF index
+    (k-means centroids plus inverted lists) in ``ivf.npz`` narrows searches
+    over large corpora; rows added after the index was built are always
+    searched exactly.
+    """
+
+    def __init__(self, directory: str, dim: Optional[int] = None):
+        self.directory = directory
+        self.dim = dim
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._meta_path = os.path.join(directory, "meta.jsonl")
+        self._index_path = os.path.join(directory, "ivf.npz")
+        self._lock = threading.Lock()
+        self._meta: List[Dict] = []
+        self._ids: Dict[str, int] = {}
+        self._meta_offset = 0
+        self._matrix: Optional[np.memmap] = None
+        self._ivf: Optional[Dict] = None
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+        self._refresh()
+
+    def __len__(self) -> int:
+        return len(self._meta)
+
+    def _refresh(self) -> None:
+        """Pick up rows appended since the last read, including by other processes"""
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                f.seek(self._meta_offset)
+                for line in f:
+                    if not line.endswith("\n"):
+                        break  # partially written record; read it next time
+                    self._meta_offset += len(line.encode("utf-8"))
+                    record = json.loads(line)
+                    self._ids[record["id"]] = record["row"]
+                    self._meta.append(record)
+                    self.dim = self.dim or record.get("dim")
+
+        rows = len(self._meta)
+        if rows and self.dim and (self._matrix is None or self._matrix.shape[0] != rows):
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+
+    def contains(self, rid: str) -> bool:
+        """Check if a resume id is already stored"""
+        return rid in self._ids
+
+    def add(self, rid: str, embedding: np.ndarray, metadata: Optional[Dict] = None) -> bool:
+        """Append one normalized embedding; returns False if the id was already stored"""
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        with self._lock:
+            self._refresh()
+            if rid in self._ids:
+                return False
+            if self.dim is None:
+                self.dim = embedding.shape[0]
+            if embedding.shape[0] != self.dim:
+                raise ValueError(f"Expected a {self.dim}-dim embedding, got {embedding.shape[0]}")
+
+            with open(self._meta_path, "a", encoding="utf-8") as meta_file:
+                if fcntl is not None:
+                    fcntl.flock(meta_file, fcntl.LOCK_EX)
+                try:
+                    # Another process may have appended since our last refresh
+                    self._refresh()
+                    if rid in self._ids:
+                        return False
+                    row = len(self._meta)
+                    with open(self._vectors_path, "ab") as vectors_file:
+                        vectors_file.truncate(row * self.dim * 4)  # drop a torn row from a crash
+                        vectors_file.write(embedding.tobytes())
+                    record = {"row": row, "id": rid, "dim": self.dim, "added_at": time.time(), **(metadata or {})}
+                    meta_file.write(json.dumps(record) + "\n")
+                    meta_file.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(meta_file, fcntl.LOCK_UN)
+            self._refresh()
+        return True
+
+    def search(self, query: np.ndarray, top_k: int = 10, approximate: bool = False, n_probe: int = 8) -> List[Dict]:
+        """Return the top_k stored resumes by cosine similarity to a normalized query embedding"""
+        with self._lock:
+            self._refresh()
+            matrix, meta, ivf = self._matrix, self._meta, self._ivf
+        if matrix is None or not len(meta):
+            return []
+
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if approximate and ivf is not None:
+            rows = self._probe(ivf, query, n_probe, len(meta))
+            scores = matrix[rows] @ query
+        else:
+            rows = None
+            scores = np.asarray(matrix @ query)
+
+        k = min(top_k, len(scores))
+        if k <= 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        for i in best:
+            row = int(rows[i]) if rows is not None else int(i)
+            record = {key: value for key, value in meta[row].items() if key != "dim"}
+            results.append({**record, "score": round(float(scores[i]) * 100, 1)})
+        return results
+
+    def _probe(self, ivf: Dict, query: np.ndarray, n_probe: int, total_rows: int) -> np.ndarray:
+        """Candidate rows from the n_probe nearest IVF lists plus rows added after the build"""
+        centroid_scores = ivf["centroids"] @ query
+        lists = np.argsort(-centroid_scores)[:max(1, n_probe)]
+        offsets, members = ivf["offsets"], ivf["members"]
+        parts = [members[offsets[c]:offsets[c + 1]] for c in lists]
+        parts.append(np.arange(ivf["indexed_rows"], total_rows))
+        return np.concatenate(parts).astype(np.int64)
+
+    def build_index(self, n_lists: Optional[int] = None, iterations: int = 10, seed: int = 0) -> Dict:
+        """Build the IVF index over every stored row with spherical k-means"""
+        with self._lock:
+            self._refresh()
+            matrix = self._matrix
+        if matrix is None:
+            return {"indexed_rows": 0}
+
+        rows = matrix.shape[0]
+        n_lists = n_lists or max(1, int(np.sqrt(rows)))
+        n_lists = min(n_lists, rows)
+        rng = np.random.default_rng(seed)
+        data = np.asarray(matrix)
+        centroids = data[rng.choice(rows, n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(data @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = data[assignments == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / max(np.linalg.norm(centroid), 1e-12)
+        assignments = np.argmax(data @ centroids.T, axis=1)
+
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        ivf = {
+            "centroids": centroids.astype(np.float32),
+            "members": order.astype(np.int64),
+            "offsets": offsets.astype(np.int64),
+            "indexed_rows": rows,
+        }
+        tmp_path = self._index_path + ".tmp.npz"
+        np.savez(tmp_path, **ivf)
+        os.replace(tmp_path, self._index_path)
+        with self._lock:
+            self._ivf = ivf
+        logger.info(f"Built IVF index with {n_lists} lists over {rows} resumes")
+        return {"indexed_rows": rows, "lists": n_lists}
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self._index_path):
+            return
+        try:
+            with np.load(self._index_path) as data:
+                self._ivf = {name: data[name] for name in data.files}
+            self._ivf["indexed_rows"] = int(self._ivf["indexed_rows"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable resume index: {e}")
+            self._ivf = None
+
+    def stats(self) -> Dict:
+        """Get store size and index coverage"""
+        return {
+            "resumes": len(self._meta),
+            "dim": self.dim,
+            "indexed_rows": self._ivf["indexed_rows"] if self._ivf else 0,
+            "index_lists": len(self._ivf["centroids"]) if self._ivf else 0,
+        }
+
+
+_store: Optional[ResumeStore] = None
+_store_lock = threading.Lock()
+
+
+def get_resume_store() -> ResumeStore:
+    """Get the store for the configured embedding model and backend, opening it on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                # One store per model and backend: their embeddings are not comparable
+                model_slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", embedding_config.model_identity()).strip("_")
+                _store = ResumeStore(os.path.join(storage_config.resume_store_dir, model_slug))
+    return _store
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import tempfile
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import skill_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bump when the compiled layout changes so stale compiled files are ignored
+COMPILED_FORMAT = "1"
+
+# Terms keep inner dots ("node.js", "b.tech") and + or # ("c++", "c#"); everything else separates tokens
+TERM_TOKEN = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9+#]+)*")
+
+# Trie key of the (category, canonical name) ending at a node; never a token
+_END = ""
+
+
+def term_tokens(text: str) -> List[str]:
+    """Lowercased tokens of a document or dictionary term, as matched against the trie"""
+    return TERM_TOKEN.findall(text.lower())
+
+
+class SkillTaxonomy:
+    """Skill and education dictionary compiled into a token trie
+
+    Canonical names and their aliases are matched leftmost-longest in one
+    pass over the document's tokens, so matching cost grows with the text
+    and the longest term, not with the number of dictionary entries.
+    """
+
+    def __init__(self, trie: Dict, version: str, terms: int, categories: Tuple[str, ...], max_depth: int):
+        self.trie = trie
+        self.version = version
+        self.terms = terms
+        self.categories = categories
+        self.max_depth = max_depth
+
+    @classmethod
+    def compile(cls, taxonomy: Dict[str, Dict[str, List[str]]], version: str) -> "SkillTaxonomy":
+        """Build the trie from {category: {canonical name: [aliases]}}"""
+        trie: Dict = {}
+        terms = 0
+        conflicts = 0
+        max_depth = 0
+        for category, entries in taxonomy.items():
+            for name, aliases in entries.items():
+                for term in [name, *aliases]:
+                    tokens = term_tokens(term)
+                    if not tokens:
+                        continue
+                    node = trie
+                    for token in tokens:
+                        node = node.setdefault(token, {})
+                    if _END in node:
+                        if node[_END] != (category, name):
+                            conflicts += 1
+                        continue
+                    node[_END] = (category, name)
+                    terms += 1
+                    max_depth = max(max_depth, len(tokens))
+        if conflicts:
+            logger.warning(f"{conflicts} skill terms map to more than one entry; the first one wins")
+        return cls(trie, version, terms, tuple(taxonomy), max_depth)
+
+    def match(self, text: str) -> Dict[str, Set[str]]:
+        """Canonical names found in the text, by category"""
+        return self.match_tokens(term_tokens(text))
+
+    def match_tokens(self, tokens: List[str]) -> Dict[str, Set[str]]:
+        """Canonical names found in a document already split with term_tokens, by category"""
+        found: Dict[str, Set[str]] = {category: set() for category in self.categories}
+        i = 0
+        while i < len(tokens):
+            node = self.trie
+            best: Optional[Tuple[int, Tuple[str, str]]] = None
+            j = i
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if _END in node:
+                    best = (j, node[_END])
+            if best is None:
+                i += 1
+                continue
+            i, (category, name) = best
+            found[category].add(name)
+        return found
+
+    def stats(self) -> Dict:
+        return {"version": self.version, "terms": self.terms, "categories": list(self.categories), "max_depth": self.max_depth}
+
+
+def load_taxonomy(path: str, compiled_dir: Optional[str] = None) -> SkillTaxonomy:
+    """Load the taxonomy JSON at path, reusing its compiled trie from compiled_dir when present
+
+    The version is a hash of the JSON, so editing the dictionary produces a
+    new compiled file and invalidates anything scored with the old one.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    version = hashlib.sha256(COMPILED_FORMAT.encode("utf-8") + raw).hexdigest()[:12]
+
+    compiled_path = os.path.join(compiled_dir, f"{version}.pickle") if compiled_dir else None
+    if compiled_path and os.path.exists(compiled_path):
+        try:
+            with open(compiled_path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable compiled skill taxonomy {compiled_path}: {e}")
+
+    taxonomy = SkillTaxonomy.compile(json.loads(raw), version)
+    logger.info(f"Compiled skill taxonomy {version} with {taxonomy.terms} terms")
+    if compiled_path:
+        try:
+            os.makedirs(compiled_dir, exist_ok=True)
+            # Write then rename so concurrent workers never read a partial file
+            with tempfile.NamedTemporaryFile(dir=compiled_dir, suffix=".tmp", delete=False) as f:
+                pickle.dump(taxonomy, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f.name, compiled_path)
+        except OSError as e:
+            logger.warning(f"Could not save compiled skill taxonomy: {e}")
+    return taxonomy
+
+
+# Global taxonomy, compiled on first start and loaded from disk afterwards
+skill_taxonomy = load_taxonomy(skill_config.taxonomy_path, skill_config.compiled_dir)
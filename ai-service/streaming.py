@@ -0,0 +1,168 @@
+import contextvars
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from analyze import (
+    compact_llm_inputs,
+    compute_traditional_scores,
+    count_llm_outcome,
+    llm_cache_key,
+    llm_deadline_at,
+    llm_executor,
+    llm_time_left,
+    time_until,
+    merge_llm_analysis,
+)
+from cache import llm_cache
+from config import llm_config
+from local_llm import get_llm_client
+from tracing import span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: str, data: Dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _stream_llm(
+    resume_text: str,
+    jd_text: str,
+    deadline: float,
+    chunks: "queue.Queue",
+    cancelled: threading.Event,
+    jd_embedding: Optional[np.ndarray] = None,
+) -> None:
+    """Stream the LLM analysis into a queue: ("partial", text) chunks, then ("done", llm_analysis or None)
+
+    deadline is a time.monotonic() value; nothing is sent to the LLM once it has passed.
+    """
+    analysis = None
+    try:
+        if cancelled.is_set() or time_until(deadline) <= 0:
+            return
+        if not llm_config.is_enabled():
+            count_llm_outcome("unavailable")
+            return
+        key = llm_cache_key(resume_text, jd_text)
+        cached = llm_cache.get(key)
+        if cached is not None:
+            # Nothing to stream: the whole analysis arrives with the done marker
+            analysis = cached
+            count_llm_outcome("cached")
+            return
+
+        llm_client = get_llm_client()
+        if not llm_client:
+            logger.info("No LLM server available, using traditional scoring")
+            count_llm_outcome("unavailable")
+            return
+
+        prompt_resume, prompt_jd = compact_llm_inputs(resume_text, jd_text, jd_embedding)
+        timeout = time_until(deadline)
+        if timeout <= 0:
+            return
+        parts = []
+        with span("llm_generate"):
+            for chunk in llm_client.stream_analysis(prompt_resume, prompt_jd, timeout=timeout):
+                if cancelled.is_set():
+                    return  # closing the response tells the server to stop generating
+                parts.append(chunk)
+                chunks.put(("partial", chunk))
+
+        parsed = llm_client.parse_analysis("".join(parts))
+        if parsed and "llm_analysis" in parsed:
+            analysis = parsed["llm_analysis"]
+            count_llm_outcome("completed")
+            llm_cache.set(key, analysis)
+        else:
+            logger.warning("LLM analysis failed, using traditional scoring only")
+            count_llm_outcome("failed")
+    except Exception as e:
+        logger.error(f"Error in streamed LLM analysis: {e}")
+        count_llm_outcome("failed")
+    finally:
+        chunks.put(("done", analysis))
+
+
+def stream_scores(
+    resume_text: str,
+    jd_text: str,
+    use_llm: bool = True,
+    resume_name: Optional[str] = None,
+    job_profile=None,
+    llm_deadline: Optional[float] = None,
+) -> Iterator[Tuple[str, Dict]]:
+    """Yield (event, data) pairs: traditional scores first, then LLM progress and the enhanced fields
+
+    Events are ``scores`` (the full traditional result), any number of
+    ``llm_partial`` text chunks, one ``llm`` event with the LLM-enhanced
+    fields or the fallback reason, and a final ``done``.
+    """
+    started = time.monotonic()
+    if job_profile is not None:
+        jd_text = job_profile.text
+
+    chunks: "queue.Queue" = queue.Queue()
+    cancelled = threading.Event()
+    llm_future = None
+    if use_llm:
+        # Start generation first so it overlaps with embedding and heuristic scoring
+        count_llm_outcome("requests")
+        jd_embedding = job_profile.embedding if job_profile is not None else None
+        llm_future = llm_executor.submit(
+            contextvars.copy_context().run,
+            _stream_llm, resume_text, jd_text, llm_deadline_at(started, llm_deadline), chunks, cancelled, jd_embedding
+        )
+
+    try:
+        result, overall = compute_traditional_scores(resume_text, jd_text, resume_name, job_profile)
+        yield "scores", result
+
+        if use_llm:
+            while True:
+                remaining = llm_time_left(started, llm_deadline)
+                try:
+                    # Checked before every chunk: a model that keeps producing tokens never empties the queue
+                    if remaining <= 0:
+                        raise queue.Empty
+                    kind, payload = chunks.get(timeout=remaining)
+                except queue.Empty:
+                    kind, payload = "done", None
+                if kind == "done" and payload is None and llm_time_left(started, llm_deadline) <= 0:
+                    # Stop the generation thread, which closes the stream to the LLM server
+                    cancelled.set()
+                    logger.warning("Streamed LLM analysis missed its deadline")
+                    count_llm_outcome("deadline_fallbacks")
+                    yield "llm", {"analysisMethod": "traditional", "llmFallback": "deadline_exceeded"}
+                    break
+
+                if kind == "partial":
+                    yield "llm_partial", {"text": payload}
+                    continue
+
+                if payload:
+                    merged = merge_llm_analysis(result, payload, overall)
+                    yield "llm", {
+                        key: merged[key]
+                        for key in ["overallMatch", "recommendations", "strengths", "llmAnalysis", "analysisMethod"]
+                    }
+                else:
+                    yield "llm", {"analysisMethod": "traditional"}
+                break
+
+        yield "done", {}
+    finally:
+        cancelled.set()
+        if llm_future is not None:
+            # Drop the call if it is still queued behind other requests
+            llm_future.cancel()
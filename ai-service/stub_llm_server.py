@@ -0,0 +1,224 @@
+import argparse
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Generation and health endpoints of each server type, as called by LocalLLMClient
+GENERATE_PATHS = {"/api/generate": "ollama", "/completion": "llamacpp", "/generate": "huggingface"}
+HEALTH_PATHS = {"/api/tags": {"models": [{"name": "stub"}]}, "/health": {"status": "ok"}, "/": {"status": "ok"}}
+
+# Characters per streamed chunk, roughly one token
+STREAM_CHUNK_CHARS = 4
+
+
+class StubBehavior:
+    """Latency and failure profile of the stub server"""
+
+    def __init__(
+        self,
+        latency: float = 1.0,
+        jitter: float = 0.2,
+        failure_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 90.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "failures": 0, "malformed": 0, "slow": 0}
+
+    def draw(self) -> Dict:
+        """Outcome of one generation request: its latency and which fault, if any, to inject"""
+        with self._lock:
+            roll = self._random.random()
+            latency = max(0.0, self._random.gauss(self.latency, self.latency * self.jitter))
+            self.stats["requests"] += 1
+            outcome = "ok"
+            if roll < self.failure_rate:
+                outcome = "failure"
+                latency *= 0.1  # errors come back faster than generations
+            elif roll < self.failure_rate + self.malformed_rate:
+                outcome = "malformed"
+            elif roll < self.failure_rate + self.malformed_rate + self.slow_rate:
+                outcome = "slow"
+                latency = self.slow_latency
+            if outcome != "ok":
+                self.stats[{"failure": "failures", "malformed": "malformed", "slow": "slow"}[outcome]] += 1
+        return {"outcome": outcome, "latency": latency}
+
+
+def stub_analysis(prompt: str) -> Dict:
+    """Schema-valid analysis whose score is derived from the prompt, so replays are repeatable"""
+    score = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16) % 61 + 35
+    return {
+        "llm_analysis": {
+            "overall_assessment": "Stub assessment of the candidate.",
+            "key_strengths": ["Relevant technical experience", "Clear project outcomes"],
+            "improvement_areas": ["Quantify more achievements"],
+            "recommendation_score": score,
+            "detailed_feedback": "Generated by the stub LLM server for load testing.",
+        }
+    }
+
+
+def _prompt_of(server_type: str, body: Dict) -> str:
+    return body.get("inputs", "") if server_type == "huggingface" else body.get("prompt", "")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubLLMServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, body) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path in HEALTH_PATHS:
+            self._send_json(200, HEALTH_PATHS[self.path])
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        server_type = GENERATE_PATHS.get(self.path)
+        if server_type is None:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        draw = self.server.behavior.draw()
+        if draw["outcome"] == "failure":
+            time.sleep(draw["latency"])
+            self._send_json(500, {"error": "injected failure"})
+            return
+
+        text = json.dumps(stub_analysis(_prompt_of(server_type, body)))
+        if draw["outcome"] == "malformed":
+            text = "Sure! Here is my analysis: the candidate looks " + text[: len(text) // 3]
+
+        if body.get("stream") and server_type != "huggingface":
+            self._stream(server_type, text, draw["latency"])
+            return
+        time.sleep(draw["latency"])
+        if server_type == "ollama":
+            self._send_json(200, {"model": body.get("model"), "response": text, "done": True})
+        elif server_type == "llamacpp":
+            self._send_json(200, {"content": text, "stop": True})
+        else:
+            self._send_json(200, [{"generated_text": text}])
+
+    def _stream(self, server_type: str, text: str, latency: float) -> None:
+        """Spread the latency over the chunks, as token generation would"""
+        chunks = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+        delay = latency / max(1, len(chunks))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson" if server_type == "ollama" else "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for chunk in chunks + [""]:
+            time.sleep(delay if chunk else 0)
+            if server_type == "ollama":
+                line = json.dumps({"response": chunk, "done": not chunk}) + "\n"
+            else:
+                line = "data: " + json.dumps({"content": chunk, "stop": not chunk}) + "\n\n"
+            self.wfile.write(line.encode("utf-8"))
+            self.wfile.flush()
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """Local imitation of the Ollama, llama.cpp and HuggingFace endpoints used by LocalLLMClient"""
+
+    daemon_threads = True
+    # The default listen backlog of 5 drops connections when many clients connect at once
+    request_queue_size = 256
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, behavior: Optional[StubBehavior] = None):
+        super().__init__((host, port), _Handler)
+        self.behavior = behavior or StubBehavior()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubLLMServer":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def add_behavior_arguments(parser: argparse.ArgumentParser, prefix: str = "") -> None:
+    """Latency and failure options shared by this server's CLI and the load tester"""
+    parser.add_argument(f"--{prefix}latency", type=float, default=1.0, help="Mean seconds per generation")
+    parser.add_argument(f"--{prefix}jitter", type=float, default=0.2, help="Latency standard deviation, as a fraction of the mean")
+    parser.add_argument(f"--{prefix}failure-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument(f"--{prefix}malformed-rate", type=float, default=0.0, help="Fraction of responses that are not valid analysis JSON")
+    parser.add_argument(f"--{prefix}slow-rate", type=float, default=0.0, help="Fraction of requests that take --slow-latency seconds")
+    parser.add_argument(f"--{prefix}slow-latency", type=float, default=90.0)
+    parser.add_argument(f"--{prefix}seed", type=int, default=None, help="Seed for repeatable latency and failure draws")
+
+
+def behavior_from_args(args: argparse.Namespace, prefix: str = "") -> StubBehavior:
+    prefix = prefix.replace("-", "_")
+    return StubBehavior(
+        latency=getattr(args, f"{prefix}latency"),
+        jitter=getattr(args, f"{prefix}jitter"),
+        failure_rate=getattr(args, f"{prefix}failure_rate"),
+        malformed_rate=getattr(args, f"{prefix}malformed_rate"),
+        slow_rate=getattr(args, f"{prefix}slow_rate"),
+        slow_latency=getattr(args, f"{prefix}slow_latency"),
+        seed=getattr(args, f"{prefix}seed"),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stub LLM server for offline load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434, help="Port to listen on (Ollama's default)")
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.host, args.port, behavior_from_args(args))
+    logger.info(f"Stub LLM server on {server.url} (Ollama, llama.cpp and HuggingFace endpoints)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Stub LLM server stopped: {server.behavior.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from config import telemetry_config
+from metrics import request_seconds, requests_in_flight, stage_seconds
+from profiler import slow_request_profiler
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """Time spent in each stage of one request; stages that repeat are summed"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self._stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        # Stages of the LLM call are added from an executor thread
+        with self._lock:
+            self._stages[stage] = self._stages.get(stage, 0.0) + seconds
+
+    def timings(self) -> Dict[str, float]:
+        """Milliseconds per stage, plus the request's total so far"""
+        with self._lock:
+            timings = {stage: round(seconds * 1000, 2) for stage, seconds in self._stages.items()}
+        timings["total"] = round((time.perf_counter() - self.started) * 1000, 2)
+        return timings
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a pipeline stage into the stage histogram and the current request's trace, if any"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        stage_seconds.observe(seconds, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(stage, seconds)
+
+
+def traced(stage: str) -> Callable:
+    """Decorator form of span"""
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def begin_request(endpoint: str, profile: bool = True) -> Dict:
+    """Start tracing a request, and when enabled profile the thread handling it
+
+    Requests served on an event loop share its thread, so they pass
+    profile=False; their stacks cannot be told apart.
+    """
+    requests_in_flight.inc(endpoint=endpoint)
+    trace = Trace(endpoint)
+    return {
+        "trace": trace,
+        "token": _current_trace.set(trace),
+        "profile": slow_request_profiler.begin() if profile else None,
+    }
+
+
+def end_request(state: Dict, status: int) -> None:
+    """Record a finished request's latency and save its profile if it was slow"""
+    trace: Trace = state["trace"]
+    seconds = time.perf_counter() - trace.started
+    request_seconds.observe(seconds, endpoint=trace.name, status=str(status))
+    requests_in_flight.dec(endpoint=trace.name)
+    slow_request_profiler.end(state["profile"], trace.name, seconds, trace.timings())
+    try:
+        _current_trace.reset(state["token"])
+    except ValueError:
+        # Reset from a different context, e.g. after a streamed response
+        _current_trace.set(None)
+
+
+def attach_timings(result: Dict, requested: bool = False) -> Dict:
+    """Add the current request's stage timings to a response when RESPONSE_TIMINGS is on or the client asked"""
+    trace = _current_trace.get()
+    if trace is not None and (requested or telemetry_config.response_timings):
+        result["timings"] = trace.timings()
+    return result